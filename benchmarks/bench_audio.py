@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""音频库刷新和提醒声音的启动延迟
+
+- 音频库刷新：AudioIndex.refresh() 在大目录上的首次扫描和无变化时的再次扫描
+- 提醒启动延迟：AlarmPlayer.play() 在音频已预解码和未解码时的耗时，
+  以及通过 AudioWorker 播放时调用方的入队耗时和入队到开始播放的延迟，
+  使用pygame的dummy音频驱动，未安装pygame时跳过
+
+用法: python benchmarks/bench_audio.py [文件数 ...]
+"""
+
+import os
+import sys
+import wave
+
+from common import time_call, temp_dir
+from audio import AudioIndex, SoundCache, AlarmPlayer, AudioWorker
+
+
+def write_wav(path, seconds=1.0, rate=22050):
+    """写入一段静音WAV"""
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b"\0\0" * int(seconds * rate))
+
+
+def bench_index(count):
+    with temp_dir() as directory:
+        audio_dir = os.path.join(directory, "audio")
+        os.mkdir(audio_dir)
+        template = os.path.join(directory, "template.wav")
+        write_wav(template, seconds=0.01)
+        with open(template, 'rb') as f:
+            data = f.read()
+        for i in range(count):
+            with open(os.path.join(audio_dir, f"sound{i}.wav"), 'wb') as f:
+                f.write(data)
+
+        index_file = os.path.join(directory, "audio_index.json")
+
+        def cold():
+            index = AudioIndex(audio_dir, index_file)
+            index.refresh()
+            index.save()
+
+        cold_time = time_call(cold, repeat=3)
+        index = AudioIndex(audio_dir, index_file)
+        load_time = time_call(index.load, repeat=3)
+        warm_time = time_call(index.refresh, repeat=3)
+        return {
+            "cold_refresh_ms": cold_time * 1000,
+            "index_load_ms": load_time * 1000,
+            "warm_refresh_ms": warm_time * 1000,
+        }
+
+
+def bench_alarm(repeat=20):
+    try:
+        import pygame
+    except ImportError:
+        return {"skipped": "pygame 未安装"}
+
+    pygame.mixer.init()
+    try:
+        with temp_dir() as directory:
+            path = os.path.join(directory, "alarm.wav")
+            write_wav(path, seconds=3.0, rate=44100)
+
+            cache = SoundCache()
+            cache.set_ready()
+            player = AlarmPlayer(cache)
+
+            def play_cold():
+                cache.clear()
+                player.play("bench", path)
+                player.stop("bench")
+
+            def play_cached():
+                player.play("bench", path)
+                player.stop("bench")
+
+            cold = time_call(play_cold, repeat=repeat)
+            cache.preload(path)
+            cached = time_call(play_cached, repeat=repeat)
+            player.stop_all()
+            return {"cold_play_ms": cold * 1000, "cached_play_ms": cached * 1000,
+                    **bench_worker(path, repeat)}
+    finally:
+        pygame.mixer.quit()
+
+
+def bench_worker(path, repeat):
+    """界面线程调用 AudioWorker.play() 的耗时，以及命令在音频线程中开始播放的延迟"""
+    worker = AudioWorker()
+    delays = []
+    worker.subscribe("played", lambda owner, ok, delay: delays.append(delay))
+    worker.start()
+    worker.preload(path)
+    worker.flush()
+
+    def enqueue():
+        worker.play("bench", path)
+        worker.stop("bench")
+
+    enqueue_time = time_call(enqueue, repeat=repeat)
+    worker.flush()
+    worker.close()
+    return {"worker_enqueue_ms": enqueue_time * 1000, "worker_start_ms": min(delays) * 1000}
+
+
+def run(quick=False, sizes=None):
+    """运行基准测试，返回结果字典（毫秒）"""
+    sizes = sizes or ([100, 1000] if quick else [100, 1000, 10000])
+    return {
+        "audio_index": {str(count): bench_index(count) for count in sizes},
+        "alarm_start": bench_alarm(),
+    }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or None
+    result = run(sizes=sizes)
+    for count, timings in result["audio_index"].items():
+        print(f"{count} 个音频文件：首次扫描 {timings['cold_refresh_ms']:.1f} ms，"
+              f"读取索引 {timings['index_load_ms']:.1f} ms，再次扫描 {timings['warm_refresh_ms']:.1f} ms")
+    alarm = result["alarm_start"]
+    if "skipped" in alarm:
+        print(f"提醒启动延迟：跳过（{alarm['skipped']}）")
+    else:
+        print(f"提醒启动延迟：未解码 {alarm['cold_play_ms']:.2f} ms，已预解码 {alarm['cached_play_ms']:.2f} ms")
+        print(f"音频线程：入队 {alarm['worker_enqueue_ms']:.3f} ms，入队到开始播放 {alarm['worker_start_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
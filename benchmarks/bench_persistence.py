@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""配置保存和加载的往返耗时
+
+分别测试JSON文件（ConfigStore）和SQLite（SQLiteStore）在不同任务数下的：
+完整快照写入、全部加载（包括构建Task）、只加载第一屏、单个任务改动、按ID读取。
+不需要Qt和pygame。
+
+用法: python benchmarks/bench_persistence.py [任务数 ...]
+"""
+
+import sys
+from itertools import islice
+
+from common import time_call, temp_dir
+from engine import Task
+from storage import ConfigStore, SQLiteStore
+
+FIRST_SCREEN = 30
+
+
+def make_config(count):
+    tasks = [Task(name=f"任务{i}", minutes=1 + i % 59, reminder_text=f"提醒{i}") for i in range(count)]
+    return {
+        'tasks': [task.to_dict() for task in tasks],
+        'audio': {'channels': 8},
+        'window': {'x': 100, 'y': 100, 'width': 600, 'height': 500},
+    }
+
+
+def load_tasks(store):
+    config = store.load_settings()
+    return [Task.from_dict(data) for chunk in store.iter_tasks(config) for data in chunk]
+
+
+def load_first_screen(store):
+    config = store.load_settings()
+    stream = (Task.from_dict(data) for chunk in store.iter_tasks(config, first_chunk_size=FIRST_SCREEN)
+              for data in chunk)
+    return list(islice(stream, FIRST_SCREEN))
+
+
+def bench_store(store, config):
+    task_ids = [data['id'] for data in config['tasks']]
+    changed = dict(config['tasks'][len(task_ids) // 2], name="改动")
+
+    def single_change():
+        store.append({'op': 'upsert', 'task': changed})
+        store.flush()
+
+    result = {
+        "save_ms": time_call(lambda: store.compact(config), repeat=3) * 1000,
+        "load_all_ms": time_call(lambda: load_tasks(store), repeat=3) * 1000,
+        "load_first_screen_ms": time_call(lambda: load_first_screen(store), repeat=3) * 1000,
+        "get_by_id_ms": time_call(lambda: store.get_task(task_ids[-1]), repeat=20) * 1000,
+    }
+    if store.incremental:
+        result["single_change_ms"] = time_call(single_change, repeat=20) * 1000
+    return result
+
+
+def run(quick=False, sizes=None):
+    """运行基准测试，返回 {后端: {任务数: 结果}} （毫秒）"""
+    sizes = sizes or ([100, 1000] if quick else [100, 1000, 10000, 50000])
+    results = {"json": {}, "json_journal": {}, "sqlite": {}}
+
+    for count in sizes:
+        config = make_config(count)
+        with temp_dir() as directory:
+            for name, factory in (
+                ("json", lambda: ConfigStore(f"{directory}/settings.json")),
+                ("json_journal", lambda: ConfigStore(f"{directory}/journal.json", use_journal=True)),
+                ("sqlite", lambda: SQLiteStore(f"{directory}/settings.db")),
+            ):
+                store = factory()
+                try:
+                    results[name][str(count)] = bench_store(store, config)
+                finally:
+                    store.close()
+    return results
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or None
+    for backend, by_count in run(sizes=sizes).items():
+        print(backend)
+        for count, result in by_count.items():
+            details = "，".join(f"{key} {value:.2f}" for key, value in result.items())
+            print(f"  {count} 个任务：{details}")
+
+
+if __name__ == "__main__":
+    main()
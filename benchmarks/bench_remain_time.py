@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""剩余时间刷新的单次耗时对比
+
+对比旧版 TaskListItem.update_remain_time 每秒调用 setStyleSheet 的方式
+与当前绘制代理使用预先创建颜色的方式，默认500个运行中任务。
+
+用法: python benchmarks/bench_remain_time.py [任务数] [刷新次数]
+"""
+
+import sys
+import time
+
+from common import qt_app
+
+from PySide6.QtWidgets import QApplication, QLabel, QListView, QVBoxLayout, QWidget, QStyleOptionViewItem
+from PySide6.QtGui import QImage, QPainter
+from PySide6.QtCore import QRect
+
+import main as app_main
+from engine import TimerEngine
+
+
+def make_tasks(count):
+    """创建指定数量的运行中任务，剩余时间分布在三个颜色分段"""
+    tasks = []
+    now = time.monotonic()
+    for i in range(count):
+        task = app_main.Task(name=f"任务{i}", minutes=1, reminder_text=f"提醒{i}")
+        task.running = True
+        task.deadline = now + (i % 60)
+        tasks.append(task)
+    return tasks
+
+
+def bench_stylesheet(tasks, ticks):
+    """旧实现：每个任务一个QLabel，每次刷新都重新设置样式表"""
+    container = QWidget()
+    layout = QVBoxLayout(container)
+    labels = []
+    for _ in tasks:
+        label = QLabel()
+        layout.addWidget(label)
+        labels.append(label)
+    container.show()
+    QApplication.processEvents()
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        for task, label in zip(tasks, labels):
+            remaining = task.remaining_seconds
+            label.setText(app_main.format_seconds(remaining))
+            if remaining < 10:
+                label.setStyleSheet("font-size: 14px; color: #FF5252; font-weight: bold;")
+            elif remaining < 30:
+                label.setStyleSheet("font-size: 14px; color: #FFA000; font-weight: bold;")
+            else:
+                label.setStyleSheet("font-size: 14px; color: #00C853; font-weight: bold;")
+        QApplication.processEvents()
+    elapsed = time.perf_counter() - start
+
+    container.close()
+    return elapsed / ticks
+
+
+def bench_delegate(tasks, ticks):
+    """当前实现：绘制代理直接绘制所有行（不考虑可见区域裁剪，为最差情况）"""
+    engine = TimerEngine()
+    for task in tasks:
+        engine.add_task(task)
+    model = app_main.TaskListModel(engine)
+    view = QListView()
+    view.setModel(model)
+    delegate = app_main.TaskItemDelegate(view)
+
+    height = app_main.TaskItemDelegate.ITEM_HEIGHT
+    image = QImage(600, height, QImage.Format_ARGB32_Premultiplied)
+    option = QStyleOptionViewItem()
+    option.rect = QRect(0, 0, 600, height)
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        painter = QPainter(image)
+        for row in range(len(tasks)):
+            delegate.paint(painter, option, model.index(row))
+        painter.end()
+    elapsed = time.perf_counter() - start
+    return elapsed / ticks
+
+
+def run(quick=False, count=None, ticks=None):
+    """运行基准测试，返回结果字典（毫秒）"""
+    count = count or (100 if quick else 500)
+    ticks = ticks or (5 if quick else 20)
+
+    qt_app()
+    tasks = make_tasks(count)
+    return {
+        "tasks": count,
+        "ticks": ticks,
+        "stylesheet_ms_per_tick": bench_stylesheet(tasks, ticks) * 1000,
+        "delegate_ms_per_tick": bench_delegate(tasks, ticks) * 1000,
+    }
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    result = run(count=count, ticks=ticks)
+
+    print(f"{result['tasks']} 个运行中任务，{result['ticks']} 次刷新")
+    print(f"  setStyleSheet 方式: {result['stylesheet_ms_per_tick']:.2f} ms/次")
+    print(f"  绘制代理方式:       {result['delegate_ms_per_tick']:.2f} ms/次")
+
+
+if __name__ == "__main__":
+    main()
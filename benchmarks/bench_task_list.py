@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""任务列表界面的耗时
+
+在offscreen平台上创建真实的主窗口（用户目录指向临时目录），测试：
+- 逐个添加任务到列表的单任务耗时，以及批量添加的单任务耗时
+- 不同运行中任务数下每次 _update_all_tasks 刷新（含重绘）的耗时
+- 同一时刻到期的大量任务从截止时间到提醒显示（单独或在汇总对话框中）的延迟
+
+用法: python benchmarks/bench_task_list.py [运行中任务数 ...]
+"""
+
+import sys
+import time
+
+from common import isolated_home, qt_app
+from engine import Task
+
+ADD_COUNT = 2000
+ALARM_COUNT = 50  # 超过 AlarmQueue.MAX_VISIBLE，覆盖汇总对话框
+
+
+def make_tasks(count):
+    return [Task(name=f"任务{i}", minutes=1 + i % 59, reminder_text=f"提醒{i}") for i in range(count)]
+
+
+def create_window():
+    import main as app_main
+    window = app_main.CountdownTimer()
+    window.show()
+    window.on_first_frame()
+    window.task_model.set_tasks([])
+    qt_app().processEvents()
+    return window
+
+
+def close_window(window):
+    # 避免退出时写入大量任务
+    window.task_model.set_tasks([])
+    window.close()
+    qt_app().processEvents()
+
+
+def bench_add(window, count):
+    app = qt_app()
+    tasks = make_tasks(count)
+    start = time.perf_counter()
+    for task in tasks:
+        window.task_model.add_task(task)
+    app.processEvents()
+    single = (time.perf_counter() - start) / count
+
+    window.task_model.set_tasks([])
+    tasks = make_tasks(count)
+    start = time.perf_counter()
+    window.task_model.add_tasks(tasks)
+    app.processEvents()
+    batch = (time.perf_counter() - start) / count
+
+    window.task_model.set_tasks([])
+    return {"add_task_us_per_task": single * 1e6, "add_tasks_batch_us_per_task": batch * 1e6}
+
+
+def bench_tick(window, count, ticks=20):
+    app = qt_app()
+    tasks = make_tasks(count)
+    window.task_model.add_tasks(tasks)
+    for task in tasks:
+        window.engine.start(task)
+    app.processEvents()
+
+    best = None
+    for _ in range(ticks):
+        start = time.perf_counter()
+        window._update_all_tasks()
+        window.task_list.viewport().repaint()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    for task in tasks:
+        window.engine.stop(task)
+    window.task_model.set_tasks([])
+    return best * 1000
+
+
+def bench_alarm(window, count=ALARM_COUNT, delay=0.05, timeout=5.0):
+    app = qt_app()
+    tasks = make_tasks(count)
+    window.task_model.add_tasks(tasks)
+    window.alarms.latencies.clear()
+    for task in tasks:
+        window.engine.start(task, seconds=delay)
+
+    end = time.monotonic() + timeout
+    while len(window.alarms.latencies) < count and time.monotonic() < end:
+        app.processEvents()
+        time.sleep(0.001)
+
+    latencies = sorted(latency * 1000 for latency in window.alarms.latencies)
+    window.alarms.dismiss_all()
+    app.processEvents()
+    window.task_model.set_tasks([])
+    return {
+        "alarms": len(latencies),
+        "min_ms": latencies[0] if latencies else None,
+        "max_ms": latencies[-1] if latencies else None,
+    }
+
+
+def run(quick=False, sizes=None):
+    """运行基准测试，返回结果字典"""
+    sizes = sizes or ([10, 100, 1000] if quick else [10, 100, 1000, 10000])
+    qt_app()
+    with isolated_home():
+        window = create_window()
+        try:
+            return {
+                "add": bench_add(window, ADD_COUNT // 10 if quick else ADD_COUNT),
+                "tick_ms": {str(count): bench_tick(window, count) for count in sizes},
+                "deadline_to_alarm": bench_alarm(window),
+            }
+        finally:
+            close_window(window)
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or None
+    result = run(sizes=sizes)
+    add = result["add"]
+    print(f"添加任务：逐个 {add['add_task_us_per_task']:.1f} µs/个，批量 {add['add_tasks_batch_us_per_task']:.1f} µs/个")
+    for count, ms in result["tick_ms"].items():
+        print(f"{count} 个运行中任务：每次刷新 {ms:.3f} ms")
+    alarm = result["deadline_to_alarm"]
+    print(f"截止时间到提醒显示：{alarm['alarms']} 个提醒，最短 {alarm['min_ms']} ms，最长 {alarm['max_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
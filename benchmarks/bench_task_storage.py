@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""任务存储的内存占用和单次刷新耗时
+
+对比对象存储（Task + TimerEngine）与列式存储（TaskColumns，包括批量刷新 tick()），
+默认规模为1千、10万和100万个运行中任务，不需要Qt和pygame。
+
+用法: python benchmarks/bench_task_storage.py [任务数 ...]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from common import time_call
+from engine import Task, TaskColumns, TimerEngine
+
+
+def measure_memory(build):
+    """返回build()创建的对象占用的字节数和创建结果"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def bench_objects(count, now):
+    def build():
+        engine = TimerEngine(clock=lambda: now)
+        for i in range(count):
+            task = Task(minutes=25)
+            engine.add_task(task)
+            engine.start(task, seconds=60 + i % 3600)
+        return engine
+
+    memory, engine = measure_memory(build)
+    tick = time_call(lambda: (engine.advance(now), engine.next_deadline()))
+    remaining = time_call(lambda: [task.remaining_seconds for task in engine.running_tasks.values()], repeat=1)
+    return memory / count, tick, remaining
+
+
+def bench_columns(count, now):
+    def build():
+        columns = TaskColumns(capacity=count)
+        for i in range(count):
+            task_id = f"task-{i}"
+            columns.add(task_id, 1500)
+            columns.start(task_id, now, 60 + i % 3600)
+        return columns
+
+    memory, columns = measure_memory(build)
+    tick = time_call(lambda: columns.expired(now))
+    remaining = time_call(lambda: columns.remaining(now), repeat=1)
+
+    # 批量刷新：每次前进1秒，所有运行中任务的显示值都会变化
+    seconds = iter(range(1, 1000))
+    batch = time_call(lambda: columns.tick(now + next(seconds)))
+    return memory / count, tick, remaining, batch
+
+
+def run(quick=False, sizes=None):
+    """运行基准测试，返回 {任务数: 结果} （毫秒、字节）"""
+    sizes = sizes or ([1000, 10000] if quick else [1000, 100000, 1000000])
+    now = time.monotonic()
+
+    results = {}
+    for count in sizes:
+        obj_mem, obj_tick, obj_remaining = bench_objects(count, now)
+        col_mem, col_tick, col_remaining, col_batch = bench_columns(count, now)
+        results[str(count)] = {
+            "objects": {
+                "bytes_per_task": obj_mem,
+                "idle_tick_ms": obj_tick * 1000,
+                "all_remaining_ms": obj_remaining * 1000,
+            },
+            "columns": {
+                "bytes_per_task": col_mem,
+                "expiry_scan_ms": col_tick * 1000,
+                "all_remaining_ms": col_remaining * 1000,
+                "batch_tick_ms": col_batch * 1000,
+            },
+        }
+    return results
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or None
+    for count, result in run(sizes=sizes).items():
+        obj, col = result["objects"], result["columns"]
+        print(f"{count} 个运行中任务")
+        print(f"  对象存储: {obj['bytes_per_task']:.0f} 字节/任务，空闲刷新 {obj['idle_tick_ms']:.3f} ms，"
+              f"计算全部剩余时间 {obj['all_remaining_ms']:.1f} ms")
+        print(f"  列式存储: {col['bytes_per_task']:.0f} 字节/任务，到期检查 {col['expiry_scan_ms']:.3f} ms，"
+              f"计算全部剩余时间 {col['all_remaining_ms']:.1f} ms，批量刷新 {col['batch_tick_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
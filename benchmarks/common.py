@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""基准测试的公共设置
+
+导入本模块即设置无界面运行环境：Qt使用offscreen平台，pygame使用dummy音频驱动，
+关闭本地控制接口（不占用正在运行的程序的套接字），并把 src 加入模块搜索路径。
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import contextlib
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+os.environ["COUNTDOWN_TIMER_CONTROL"] = "0"
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+
+def time_call(func, repeat=5):
+    """多次调用取最短耗时（秒）"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@contextlib.contextmanager
+def temp_dir():
+    """临时目录，退出时删除"""
+    path = tempfile.mkdtemp(prefix="countdown-bench-")
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextlib.contextmanager
+def isolated_home():
+    """把用户目录指向临时目录，避免读写真实的 ~/.countdown_timer"""
+    saved = {key: os.environ.get(key) for key in ("HOME", "USERPROFILE")}
+    with temp_dir() as home:
+        os.environ["HOME"] = os.environ["USERPROFILE"] = home
+        try:
+            yield home
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+def qt_app():
+    """获取或创建QApplication"""
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""对比两次基准测试的结果
+
+逐项列出两个结果文件中都存在的数值，以及变化的百分比。
+
+用法: python benchmarks/compare.py 基准结果.json 新结果.json
+"""
+
+import sys
+import json
+
+
+def flatten(data, prefix=""):
+    """把嵌套字典展开为 路径 -> 数值"""
+    values = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            values.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = value
+    return values
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 2
+
+    runs = []
+    for path in sys.argv[1:]:
+        with open(path, 'r', encoding='utf-8') as f:
+            runs.append(json.load(f))
+    before, after = (flatten(run["results"]) for run in runs)
+
+    print(f"{runs[0]['meta'].get('commit')} -> {runs[1]['meta'].get('commit')}")
+    width = max((len(path) for path in before), default=0)
+    for path in sorted(before.keys() & after.keys()):
+        old, new = before[path], after[path]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "-"
+        print(f"{path:<{width}}  {old:>12.3f}  {new:>12.3f}  {change:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
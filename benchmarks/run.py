@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""运行全部基准测试并把结果写入JSON
+
+在无显示的Linux上也可以运行（Qt使用offscreen平台，pygame使用dummy音频驱动）。
+结果文件包含提交号、Python和依赖版本，可以用 compare.py 对比两次运行。
+
+用法: python benchmarks/run.py [--quick] [--output 文件] [测试名 ...]
+测试名: task_storage persistence audio remain_time task_list
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import importlib
+import traceback
+
+import common
+
+BENCHMARKS = {
+    "task_storage": "bench_task_storage",  # 只需要Python
+    "persistence": "bench_persistence",  # 只需要Python
+    "audio": "bench_audio",  # 提醒延迟部分需要pygame
+    "remain_time": "bench_remain_time",  # 需要PySide6
+    "task_list": "bench_task_list",  # 需要PySide6
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=common.ROOT,
+            stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def module_version(name):
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        return None
+    return getattr(module, "__version__", "unknown")
+
+
+def metadata(quick):
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quick": quick,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "versions": {name: module_version(name) for name in ("PySide6", "pygame", "numpy")},
+        "env": {key: os.environ.get(key) for key in ("QT_QPA_PLATFORM", "SDL_AUDIODRIVER")},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="运行基准测试并写入JSON结果")
+    parser.add_argument("names", nargs="*", help="要运行的测试，默认全部")
+    parser.add_argument("--quick", action="store_true", help="使用较小的规模快速运行")
+    parser.add_argument("--output", help="结果文件，默认为 benchmarks/results/<提交号>-<时间>.json")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error("未知的测试：" + "、".join(sorted(unknown)))
+
+    meta = metadata(args.quick)
+    results = {}
+    for name in args.names or BENCHMARKS:
+        print(f"运行 {name} ...", flush=True)
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(BENCHMARKS[name])
+            results[name] = module.run(quick=args.quick)
+        except ImportError as e:
+            # 缺少可选依赖（如PySide6）时记录并继续
+            results[name] = {"skipped": str(e)}
+        except Exception:
+            results[name] = {"error": traceback.format_exc()}
+        print(f"  完成，用时 {time.perf_counter() - start:.1f} s")
+
+    output = args.output
+    if not output:
+        name = f"{meta['commit'] or 'nogit'}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        output = os.path.join(common.ROOT, "benchmarks", "results", name)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
+
+    return 1 if any("error" in result for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,521 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""提醒音频
+
+SoundCache 在任务开始时把提醒音频预先解码为 pygame.mixer.Sound，
+提醒触发时直接播放，不再在到期那一刻读取和解码文件。
+AlarmPlayer 为每个提醒分配独立的通道，多个提醒可以同时播放。
+AudioWorker 在独立线程中初始化混音器并按顺序执行解码和播放命令，界面线程只负责入队。
+AudioIndex 持久化保存音频库的文件信息，启动时直接读取，只重新检查有变化的文件。
+
+pygame 在第一次使用时才导入，不影响程序启动速度。
+"""
+
+import os
+import json
+import time
+import wave
+import threading
+from collections import OrderedDict, Counter, deque
+
+from storage import atomic_write_json
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")  # 支持的音频格式
+
+
+def sound_size(sound):
+    """估算解码后音效占用的内存字节数"""
+    import pygame
+    init = pygame.mixer.get_init()
+    if not init:
+        return 0
+    frequency, size, channels = init
+    return int(sound.get_length() * frequency * channels * (abs(size) // 8))
+
+
+class SoundCache:
+    """预解码音效缓存，按内存预算进行LRU淘汰
+
+    运行中任务使用的音频会被固定，淘汰时优先移除未固定的条目；
+    只有未固定的条目全部移除后仍超出预算时才会淘汰固定的条目，
+    被淘汰的音频在播放时重新解码。
+    混音器初始化完成并调用 set_ready() 之前只记录固定关系，不进行解码。
+    """
+
+    DEFAULT_BUDGET = 64 * 1024 * 1024  # 默认内存预算 64MB
+
+    def __init__(self, budget=DEFAULT_BUDGET, on_loaded=None):
+        self.budget = budget
+        self.on_loaded = on_loaded  # 解码完成时回调，参数为 (路径, 时长秒数)
+        self.ready = False
+        self.used = 0
+        self._sounds = OrderedDict()  # 路径 -> (Sound, 字节数)
+        self._owners = {}  # 任务ID -> 固定的路径
+        self._pins = Counter()  # 路径 -> 固定该路径的任务数
+
+    def __contains__(self, path):
+        return path in self._sounds
+
+    def get(self, path):
+        """获取音效，未缓存时立即解码"""
+        entry = self._sounds.get(path)
+        if entry is not None:
+            self._sounds.move_to_end(path)
+            return entry[0]
+        return self._load(path)
+
+    def set_ready(self):
+        """混音器已初始化，解码已固定的音频"""
+        self.ready = True
+        for path in list(self._pins):
+            self.preload(path)
+
+    def preload(self, path):
+        """提前解码音效，文件不存在、混音器未就绪或解码失败时返回None"""
+        if not self.ready or not path or not os.path.exists(path):
+            return None
+
+        import pygame
+        try:
+            return self.get(path)
+        except pygame.error as e:
+            print(f"预加载音频文件时出错：{str(e)}")
+            return None
+
+    def pin(self, owner, path):
+        """为运行中的任务固定音频，并提前解码"""
+        self.unpin(owner)
+        if not path:
+            return
+        self._owners[owner] = path
+        self._pins[path] += 1
+        self.preload(path)
+
+    def unpin(self, owner):
+        """取消任务对音频的固定"""
+        path = self._owners.pop(owner, None)
+        if path is None:
+            return
+        self._pins[path] -= 1
+        if self._pins[path] <= 0:
+            del self._pins[path]
+
+    def discard(self, path):
+        """移除缓存条目，例如文件被修改或删除时"""
+        entry = self._sounds.pop(path, None)
+        if entry is not None:
+            self.used -= entry[1]
+
+    def clear(self):
+        self._sounds.clear()
+        self.used = 0
+
+    def _load(self, path):
+        import pygame
+        sound = pygame.mixer.Sound(path)
+        if self.on_loaded:
+            self.on_loaded(path, sound.get_length())
+
+        size = sound_size(sound)
+        if size > self.budget:
+            # 超过整个预算的音频不缓存
+            return sound
+
+        self._sounds[path] = (sound, size)
+        self.used += size
+        self._evict(keep=path)
+        return sound
+
+    def _evict(self, keep):
+        """淘汰最久未使用的条目直到不超出预算"""
+        for only_unpinned in (True, False):
+            for path in list(self._sounds):
+                if self.used <= self.budget:
+                    return
+                if path == keep or (only_unpinned and path in self._pins):
+                    continue
+                self.discard(path)
+
+
+class AlarmPlayer:
+    """基于 pygame.mixer.Channel 的多通道提醒播放
+
+    每个任务独占一个通道，确认某个提醒只停止它自己的声音。
+    通道用完时抢占优先级不高于新提醒的通道中最早开始播放的那个。
+    """
+
+    DEFAULT_CHANNELS = 8
+
+    def __init__(self, sound_cache, channels=DEFAULT_CHANNELS):
+        self.sound_cache = sound_cache
+        self._owned = OrderedDict()  # 任务ID -> (Channel, 优先级)，按开始播放顺序
+        self._ended = []  # 被抢占而结束播放的任务ID，由 reap() 取走
+        self.channels = []
+        self.set_channel_count(channels)
+
+    def set_channel_count(self, count):
+        """设置可用的通道数量"""
+        import pygame
+        count = max(1, int(count))
+        self.stop_all()
+        pygame.mixer.set_num_channels(count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(count)]
+
+    @property
+    def channel_count(self):
+        return len(self.channels)
+
+    def play(self, owner, path, priority=0, loops=-1):
+        """为任务播放提醒音频，没有可用通道时返回False"""
+        self.stop(owner)
+
+        sound = self.sound_cache.get(path)
+        channel = self._acquire(priority)
+        if channel is None:
+            return False
+
+        channel.play(sound, loops=loops)
+        self._owned[owner] = (channel, priority)
+        return True
+
+    def stop(self, owner):
+        """停止任务自己的提醒音频"""
+        entry = self._owned.pop(owner, None)
+        if entry is not None:
+            entry[0].stop()
+
+    def fade(self, owner, ms):
+        """在指定毫秒内淡出任务自己的提醒音频"""
+        entry = self._owned.pop(owner, None)
+        if entry is not None:
+            entry[0].fadeout(int(ms))
+
+    def stop_all(self):
+        """停止所有提醒音频"""
+        for channel, _ in self._owned.values():
+            channel.stop()
+        self._owned.clear()
+
+    def is_playing(self, owner):
+        entry = self._owned.get(owner)
+        return entry is not None and entry[0].get_busy()
+
+    @property
+    def playing(self):
+        return bool(self._owned)
+
+    def reap(self):
+        """移除已自行播放结束或被抢占的任务，返回它们的任务ID"""
+        ended, self._ended = self._ended, []
+        for owner, (channel, _) in list(self._owned.items()):
+            if not channel.get_busy():
+                del self._owned[owner]
+                ended.append(owner)
+        return ended
+
+    def _acquire(self, priority):
+        """取得一个空闲通道，必要时抢占"""
+        in_use = {id(channel) for channel, _ in self._owned.values()}
+        for channel in self.channels:
+            if id(channel) not in in_use and not channel.get_busy():
+                return channel
+
+        # 抢占优先级最低的通道，同优先级时抢占最早开始的
+        victim = None
+        for owner, (channel, owner_priority) in self._owned.items():
+            if owner_priority > priority:
+                continue
+            if victim is None or owner_priority < self._owned[victim][1]:
+                victim = owner
+
+        if victim is None:
+            return None
+
+        channel, _ = self._owned.pop(victim)
+        channel.stop()
+        self._ended.append(victim)
+        return channel
+
+
+class AudioWorker:
+    """音频工作线程
+
+    pygame的导入、混音器初始化、音频解码和播放都在这个线程中按顺序执行，
+    调用方只把命令放入队列后立即返回，慢速磁盘上的读取和解码不会阻塞界面。
+    混音器在线程启动后首先初始化，在此之前入队的命令会在初始化完成后执行。
+
+    事件在工作线程中回调，界面需要自行转到主线程（例如通过Qt信号）：
+        ready()                       混音器初始化完成
+        error(消息)                   混音器初始化失败，之后的播放命令都会失败
+        loaded(路径, 时长秒数)        音频解码完成
+        played(任务ID, 是否成功, 延迟) 播放命令已执行，延迟为从入队到开始播放的秒数
+        finished(任务ID)              声音自行播放结束或被其他提醒抢占
+    """
+
+    EVENTS = ("ready", "error", "loaded", "played", "finished")
+    POLL_INTERVAL = 0.1  # 有声音在播放时检查是否播放结束的间隔(秒)
+
+    def __init__(self, channels=AlarmPlayer.DEFAULT_CHANNELS, budget=SoundCache.DEFAULT_BUDGET):
+        self.channel_count = channels
+        self.sound_cache = SoundCache(budget, on_loaded=lambda path, length: self._emit("loaded", path, length))
+        self.player = None  # 混音器初始化后在工作线程中创建
+        self.error = None
+        self._listeners = {event: [] for event in self.EVENTS}
+
+        self._ops = deque()  # (命令名, 参数元组, 入队时间)
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = None
+
+    def subscribe(self, event, callback):
+        """订阅音频事件"""
+        self._listeners[event].append(callback)
+
+    def unsubscribe(self, event, callback):
+        self._listeners[event].remove(callback)
+
+    def _emit(self, event, *args):
+        for callback in list(self._listeners[event]):
+            callback(*args)
+
+    def start(self):
+        """启动工作线程并初始化混音器，重复调用无效"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="AudioWorker", daemon=True)
+                self._thread.start()
+
+    # 以下命令都只入队，立即返回
+
+    def preload(self, path):
+        """提前解码音频"""
+        self._submit("preload", path)
+
+    def pin(self, owner, path):
+        """为运行中的任务固定音频并提前解码"""
+        self._submit("pin", owner, path)
+
+    def unpin(self, owner):
+        self._submit("unpin", owner)
+
+    def discard(self, path):
+        """丢弃缓存的解码结果，例如文件被修改时"""
+        self._submit("discard", path)
+
+    def play(self, owner, path, priority=0, loops=-1):
+        """在任务自己的通道上播放，结果通过 played 事件返回"""
+        self._submit("play", owner, path, priority, loops)
+
+    def stop(self, owner):
+        self._submit("stop", owner)
+
+    def fade(self, owner, ms):
+        """淡出任务自己的声音"""
+        self._submit("fade", owner, ms)
+
+    def stop_all(self):
+        # 尚未执行的播放命令已经没有意义
+        with self._cond:
+            self._ops = deque(op for op in self._ops if op[0] != "play")
+        self._submit("stop_all")
+
+    def set_channel_count(self, count):
+        self._submit("set_channel_count", count)
+
+    def flush(self, timeout=None):
+        """等待已入队的命令执行完，超时返回False"""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while (self._ops or self._busy) and self._thread is not None and self._thread.is_alive():
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=1.0):
+        """停止所有声音并结束工作线程，最多等待timeout秒"""
+        self.stop_all()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _submit(self, name, *args):
+        with self._cond:
+            self._ops.append((name, args, time.monotonic()))
+            self._cond.notify_all()
+
+    def _init_mixer(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+            self.player = AlarmPlayer(self.sound_cache, self.channel_count)
+        except Exception as e:
+            self.error = e
+            print(f"初始化音频时出错：{str(e)}")
+            self._emit("error", str(e))
+            return
+        self.sound_cache.set_ready()
+        self._emit("ready")
+
+    def _run(self):
+        self._init_mixer()
+        while True:
+            with self._cond:
+                while not self._ops and not self._closed:
+                    # 有声音在播放时定期醒来检查是否播放结束
+                    if self.player is not None and self.player.playing:
+                        if not self._cond.wait(self.POLL_INTERVAL):
+                            break
+                    else:
+                        self._cond.wait()
+                if self._closed and not self._ops:
+                    return
+                op = self._ops.popleft() if self._ops else None
+                self._busy = op is not None
+
+            try:
+                if op is not None:
+                    self._execute(*op)
+                if self.player is not None:
+                    for owner in self.player.reap():
+                        self._emit("finished", owner)
+            except Exception as e:
+                print(f"音频命令执行出错：{str(e)}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _execute(self, name, args, queued_at):
+        if name == "set_channel_count":
+            self.channel_count = args[0]
+            if self.player is not None:
+                self.player.set_channel_count(args[0])
+        elif name in ("pin", "unpin", "preload", "discard"):
+            getattr(self.sound_cache, name)(*args)
+        elif name == "play":
+            owner = args[0]
+            ok = False
+            if self.player is not None:
+                try:
+                    ok = self.player.play(*args)
+                except Exception as e:
+                    print(f"播放音频文件时出错：{str(e)}")
+            self._emit("played", owner, ok, time.monotonic() - queued_at)
+        elif self.player is not None:
+            # stop、fade、stop_all
+            getattr(self.player, name)(*args)
+
+
+def wav_duration(path):
+    """读取WAV文件时长，失败时返回None"""
+    try:
+        with wave.open(path, 'rb') as f:
+            return f.getnframes() / float(f.getframerate())
+    except (wave.Error, OSError, EOFError, ZeroDivisionError):
+        return None
+
+
+class AudioIndex:
+    """音频库索引
+
+    保存每个音频文件的路径、大小、修改时间、时长和格式，启动时从索引文件读取，
+    之后按大小和修改时间只重新检查变化的文件。MP3/OGG的时长在第一次解码时补充。
+    """
+
+    VERSION = 1
+
+    def __init__(self, audio_dir, index_file):
+        self.audio_dir = audio_dir
+        self.index_file = index_file
+        self.entries = {}  # 文件名 -> 文件信息
+        self._paths = {}  # 路径 -> 文件名
+        self.dirty = False
+
+    def load(self):
+        """读取索引文件，索引不存在或不属于当前目录时返回False"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get('version') != self.VERSION or data.get('audio_dir') != self.audio_dir:
+            return False
+
+        self.entries = data.get('entries', {})
+        self._paths = {entry['path']: name for name, entry in self.entries.items()}
+        return True
+
+    def save(self):
+        """写入索引文件"""
+        atomic_write_json(self.index_file, {
+            'version': self.VERSION,
+            'audio_dir': self.audio_dir,
+            'entries': self.entries,
+        })
+        self.dirty = False
+
+    def files(self):
+        """返回 文件名 -> 路径 的映射"""
+        return {name: entry['path'] for name, entry in self.entries.items()}
+
+    def get(self, path):
+        """按路径获取文件信息"""
+        name = self._paths.get(path)
+        return self.entries.get(name) if name is not None else None
+
+    def set_duration(self, path, duration):
+        """补充文件时长"""
+        entry = self.get(path)
+        if entry is not None and entry.get('duration') != duration:
+            entry['duration'] = duration
+            self.dirty = True
+
+    def refresh(self):
+        """重新检查音频目录，返回 (新增, 删除, 修改) 的文件名列表"""
+        seen = {}
+        try:
+            with os.scandir(self.audio_dir) as it:
+                for dir_entry in it:
+                    ext = os.path.splitext(dir_entry.name)[1].lower()
+                    if ext in AUDIO_EXTENSIONS and dir_entry.is_file():
+                        seen[dir_entry.name] = dir_entry
+        except OSError:
+            pass
+
+        added, removed, changed = [], [], []
+
+        for name in list(self.entries):
+            if name not in seen:
+                self._paths.pop(self.entries.pop(name)['path'], None)
+                removed.append(name)
+
+        for name, dir_entry in seen.items():
+            stat = dir_entry.stat()
+            entry = self.entries.get(name)
+            if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                continue
+
+            (changed if entry is not None else added).append(name)
+            self.entries[name] = self._make_entry(dir_entry.path, stat)
+            self._paths[dir_entry.path] = name
+
+        if added or removed or changed:
+            self.dirty = True
+        return added, removed, changed
+
+    @staticmethod
+    def _make_entry(path, stat):
+        ext = os.path.splitext(path)[1].lower()
+        return {
+            'path': path,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'duration': wav_duration(path) if ext == ".wav" else None,
+            'format': ext[1:],
+        }
@@ -0,0 +1,558 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""本地控制接口
+
+程序运行时在本地套接字（QLocalServer，Windows上为命名管道，其他系统为
+临时目录下的Unix套接字）上接受JSON命令，每行一个请求，每行一个响应：
+
+    {"id": 1, "cmd": "create", "minutes": 25, "reminder_text": "休息", "start": true}
+    {"id": 1, "ok": true, "result": {"id": "{...}", "running": true, ...}}
+
+命令：
+    ping                                   检查程序是否在运行
+    activate                               显示并激活主窗口
+    list      [running]                    列出任务，running为true时只列出运行中的任务
+    get       task                         读取单个任务
+    create    name hours minutes seconds reminder_text audio_file enabled [start]
+    start     task [seconds]               开始任务，seconds默认为任务时长
+    stop      task                         停止任务
+    delete    task                         删除任务
+    batch     commands                     按顺序执行多条命令，返回每条命令的响应
+    subscribe / unsubscribe                订阅任务到期事件
+
+start/stop/delete/get 中的 task 为任务ID，也可以用 name 按任务名称查找。
+订阅后，任务到期时服务端推送：
+    {"event": "finished", "task": {...}, "late_ms": 到期处理相对截止时间的延迟}
+
+程序的命令行参数也会转换为上述命令（见 parse_command_line），已有实例在运行时
+forward() 把命令转发给它，新启动的进程不需要初始化Qt和pygame即可退出。
+
+本模块不依赖Qt，命令处理和客户端都可以单独使用。
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import socket
+import getpass
+
+
+def server_name():
+    """本地套接字名称，每个用户一个"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "user"
+    return f"countdown-timer-{user}"
+
+
+def server_path(name=None):
+    """套接字在文件系统中的路径，与QLocalServer的规则一致"""
+    name = name or server_name()
+    if sys.platform == "win32":
+        return r"\\.\pipe" + "\\" + name
+    return os.path.join(os.environ.get("TMPDIR") or "/tmp", name)
+
+
+class ControlError(Exception):
+    """命令执行失败，消息会返回给客户端"""
+
+
+def task_state(task):
+    """任务的完整状态，用于响应和事件"""
+    data = task.to_dict()
+    data["running"] = task.running
+    data["remaining_seconds"] = task.remaining_seconds if task.running else None
+    return data
+
+
+class ControlDispatcher:
+    """执行控制命令
+
+    host 需要提供 engine、tasks（TaskRegistry）以及
+    add_tasks(任务列表)、remove_task(任务)、ensure_loaded()、activate() 四个方法。
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.subscribers = set()  # 订阅了到期事件的会话
+        host.engine.subscribe("finished", self._on_finished)
+
+    def session(self, send):
+        """为一个连接创建会话，send(字典) 用于推送事件"""
+        return ControlSession(self, send)
+
+    def close(self):
+        self.host.engine.unsubscribe("finished", self._on_finished)
+        self.subscribers.clear()
+
+    def execute(self, session, request):
+        """执行一条命令，返回响应字典"""
+        response = {"id": request.get("id")} if isinstance(request, dict) and "id" in request else {}
+        try:
+            if not isinstance(request, dict):
+                raise ControlError("请求必须是JSON对象")
+            handler = getattr(self, "cmd_" + str(request.get("cmd")), None)
+            if handler is None:
+                raise ControlError(f"未知命令：{request.get('cmd')}")
+            response["result"] = handler(session, request)
+            response["ok"] = True
+        except (ControlError, ValueError) as e:
+            response["ok"] = False
+            response["error"] = str(e)
+        except Exception as e:
+            # 未预料的错误也要返回响应，不能让异常中断同一连接上其余命令的处理
+            print(f"控制命令执行出错：{request.get('cmd')}：{e!r}")
+            response["ok"] = False
+            response["error"] = f"内部错误：{e!r}"
+        return response
+
+    def _task(self, request):
+        task_id, name = request.get("task"), request.get("name")
+        if not isinstance(task_id, str) and not isinstance(name, str):
+            raise ControlError("缺少任务ID（task）或名称（name）")
+        self.host.ensure_loaded()
+        if isinstance(task_id, str):
+            task = self.host.tasks.get(task_id)
+        else:
+            task = next((task for task in self.host.tasks if task.name == name), None)
+        if task is None:
+            raise ControlError(f"任务不存在：{task_id or name}")
+        return task
+
+    def cmd_ping(self, session, request):
+        return {"pid": os.getpid()}
+
+    def cmd_activate(self, session, request):
+        self.host.activate()
+        return True
+
+    def cmd_list(self, session, request):
+        self.host.ensure_loaded()
+        if request.get("running"):
+            tasks = self.host.engine.running_tasks.values()
+        else:
+            tasks = self.host.tasks
+        return [task_state(task) for task in tasks]
+
+    def cmd_get(self, session, request):
+        return task_state(self._task(request))
+
+    def cmd_create(self, session, request):
+        # 延迟导入，转发命令的进程只需要客户端部分
+        from engine import Task, new_task_id
+        from transfer import validate_task_data
+
+        data = validate_task_data({key: value for key, value in request.items()
+                                   if key not in ("cmd", "id", "start")})
+        task = Task.from_dict(data)
+        task.id = new_task_id()  # 总是生成新的ID，避免与已有任务冲突
+        self.host.ensure_loaded()
+        self.host.add_tasks([task])
+        if request.get("start"):
+            self.host.engine.start(task)
+        return task_state(task)
+
+    def cmd_start(self, session, request):
+        from engine import MAX_SECONDS
+
+        task = self._task(request)
+        seconds = request.get("seconds")
+        if seconds is not None and (isinstance(seconds, bool) or not isinstance(seconds, (int, float))
+                                    or not 0 <= seconds <= MAX_SECONDS):
+            raise ControlError(f"seconds 必须在 0 到 {MAX_SECONDS} 之间")
+        if not self.host.engine.start(task, seconds=seconds):
+            raise ControlError("任务已禁用")
+        return task_state(task)
+
+    def cmd_stop(self, session, request):
+        task = self._task(request)
+        if task.running:
+            self.host.engine.stop(task)
+        return task_state(task)
+
+    def cmd_delete(self, session, request):
+        task = self._task(request)
+        self.host.remove_task(task)
+        return {"id": task.id}
+
+    def cmd_batch(self, session, request):
+        commands = request.get("commands")
+        if not isinstance(commands, list):
+            raise ControlError("commands 必须是列表")
+        return [self.execute(session, command) for command in commands]
+
+    def cmd_subscribe(self, session, request):
+        if session is None:
+            raise ControlError("只能在连接中订阅事件")
+        self.subscribers.add(session)
+        return True
+
+    def cmd_unsubscribe(self, session, request):
+        self.subscribers.discard(session)
+        return True
+
+    def _on_finished(self, task, deadline):
+        if not self.subscribers:
+            return
+        event = {
+            "event": "finished",
+            "task": task_state(task),
+            "late_ms": (self.host.engine.clock() - deadline) * 1000,
+        }
+        for session in list(self.subscribers):
+            session.send(event)
+
+
+class ControlSession:
+    """一个客户端连接：按行解析请求并返回响应"""
+
+    MAX_LINE_BYTES = 1024 * 1024  # 单个请求的长度上限，超出时断开连接
+
+    def __init__(self, dispatcher, send):
+        self.dispatcher = dispatcher
+        self.send = send
+        self._buffer = b""
+
+    def feed(self, data):
+        """收到数据，执行其中完整的每一行
+
+        请求超过长度上限时返回错误并返回False，调用方应断开连接。
+        """
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split(b"\n")
+        if len(self._buffer) > self.MAX_LINE_BYTES:
+            lines.append(self._buffer)  # 超长的不完整行，交给下面统一拒绝
+            self._buffer = b""
+        for line in lines:
+            if len(line) > self.MAX_LINE_BYTES:
+                self.send({"ok": False, "error": f"请求超过 {self.MAX_LINE_BYTES} 字节"})
+                return False
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                self.send({"ok": False, "error": f"JSON格式错误：{e}"})
+                continue
+            self.send(self.dispatcher.execute(self, request))
+        return True
+
+    def close(self):
+        self.dispatcher.subscribers.discard(self)
+
+
+def encode(message):
+    """把消息编码为一行JSON"""
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+class _NamedPipe:
+    """Windows命名管道的客户端连接，连接和读取都有超时
+
+    普通文件对象读取管道时会一直阻塞，这里先用PeekNamedPipe查询可读的字节数。
+    """
+
+    ERROR_PIPE_BUSY = 231
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, path, timeout):
+        import ctypes
+        import msvcrt
+        from ctypes import wintypes
+
+        self.timeout = timeout
+        self._ctypes = ctypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.WaitNamedPipeW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD]
+        kernel32.PeekNamedPipe.argtypes = [
+            wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD,
+            wintypes.LPDWORD, wintypes.LPDWORD, wintypes.LPDWORD,
+        ]
+        self._peek = kernel32.PeekNamedPipe
+
+        # 服务端所有管道实例都忙时等待，最多等到超时
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._file = open(path, 'r+b', buffering=0)
+                break
+            except OSError as e:
+                if getattr(e, "winerror", None) != self.ERROR_PIPE_BUSY:
+                    raise
+            remaining_ms = int((deadline - time.monotonic()) * 1000)
+            if remaining_ms <= 0 or not kernel32.WaitNamedPipeW(path, remaining_ms):
+                raise TimeoutError("连接控制接口超时")
+        self._handle = msvcrt.get_osfhandle(self._file.fileno())
+        self._buffer = b""
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def write(self, data):
+        self._file.write(data)
+
+    def flush(self):
+        pass
+
+    def readline(self):
+        """读取一行，超时抛出TimeoutError，管道断开时返回剩余数据"""
+        deadline = time.monotonic() + self.timeout if self.timeout is not None else None
+        available = self._ctypes.c_ulong()
+        while b"\n" not in self._buffer:
+            if not self._peek(self._handle, None, 0, None, self._ctypes.byref(available), None):
+                break  # 管道已断开
+            if available.value:
+                self._buffer += self._file.read(available.value)
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError("等待响应超时")
+            time.sleep(self.POLL_INTERVAL)
+        line, newline, self._buffer = self._buffer.partition(b"\n")
+        return line + newline
+
+    def close(self):
+        self._file.close()
+
+
+class ControlClient:
+    """控制接口的客户端，不依赖Qt"""
+
+    def __init__(self, name=None, timeout=2.0):
+        self.path = server_path(name)
+        self.timeout = timeout
+        self._file = None
+        self._sock = None
+        self._next_id = 0
+
+    def connect(self):
+        """连接到正在运行的程序，失败时抛出OSError"""
+        if sys.platform == "win32":
+            self._file = _NamedPipe(self.path, self.timeout)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+            self._file = sock.makefile('rwb')
+        return self
+
+    def settimeout(self, timeout):
+        """修改读取响应的超时时间，None表示一直等待"""
+        self.timeout = timeout
+        (self._file if self._sock is None else self._sock).settimeout(timeout)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self.connect() if self._file is None else self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, request):
+        """发送请求，不等待响应"""
+        self._file.write(encode(request))
+        self._file.flush()
+
+    def receive(self):
+        """读取下一条响应或事件，连接断开时返回None"""
+        line = self._file.readline()
+        return json.loads(line) if line else None
+
+    def request(self, cmd, **params):
+        """发送一条命令并等待它的响应"""
+        self._next_id += 1
+        request_id = self._next_id
+        self.send(dict(params, cmd=cmd, id=request_id))
+        while True:
+            message = self.receive()
+            if message is None:
+                raise ConnectionError("连接已断开")
+            if message.get("id") == request_id:
+                return message
+
+    def batch(self, commands):
+        """一次发送多条命令，返回每条命令的响应"""
+        response = self.request("batch", commands=commands)
+        return response.get("result", []) if response.get("ok") else [response] * len(commands)
+
+    def events(self):
+        """订阅并逐个返回到期事件"""
+        self.request("subscribe")
+        self.settimeout(None)  # 事件可能很久才来一次
+        while True:
+            message = self.receive()
+            if message is None:
+                return
+            if "event" in message:
+                yield message
+
+
+def ping(name=None, timeout=0.5):
+    """检查程序是否在运行"""
+    try:
+        with ControlClient(name, timeout) as client:
+            return client.request("ping").get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+
+DURATION_PATTERN = re.compile(r"^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?$")
+
+
+def parse_duration(text):
+    """解析时长，返回秒数
+
+    支持 25m、1h30m、90s、1:30（分:秒）、1:30:00（时:分:秒），纯数字表示分钟。
+    """
+    text = text.strip().lower()
+    if text.isdigit():
+        return int(text) * 60
+    if ":" in text:
+        parts = text.split(":")
+        if len(parts) in (2, 3) and all(part.isdigit() for part in parts):
+            seconds = 0
+            for part in parts:
+                seconds = seconds * 60 + int(part)
+            return seconds
+    else:
+        match = DURATION_PATTERN.match(text)
+        if match and any(match.groups()):
+            hours, minutes, seconds = (int(group or 0) for group in match.groups())
+            return hours * 3600 + minutes * 60 + seconds
+    raise ValueError(f"无法识别的时长：{text}")
+
+
+def parse_command_line(argv):
+    """把程序的命令行参数转换为控制命令列表
+
+        （无参数）               显示已运行的窗口
+        add 25m [提醒文本]       添加并开始一个倒计时
+        start 任务ID或名称       开始任务
+        stop 任务ID或名称        停止任务
+        list                     列出任务
+        {"cmd": ...}             直接发送JSON命令
+
+    任务ID形如 {...}，其他参数按任务名称查找。参数无法识别时抛出ValueError。
+    """
+    if not argv:
+        return [{"cmd": "activate"}]
+
+    verb, rest = argv[0], argv[1:]
+    if verb.startswith("{"):
+        return [json.loads(arg) for arg in argv]
+
+    if verb == "add":
+        if not rest:
+            raise ValueError("add 需要时长，例如 add 25m 休息一下")
+        hours, remainder = divmod(parse_duration(rest[0]), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        text = " ".join(rest[1:]) or "倒计时结束了！"
+        return [{"cmd": "create", "name": text, "reminder_text": text,
+                 "hours": hours, "minutes": minutes, "seconds": seconds, "start": True}]
+
+    if verb in ("start", "stop"):
+        if len(rest) != 1:
+            raise ValueError(f"{verb} 需要一个任务ID或名称")
+        key = "task" if rest[0].startswith("{") and rest[0].endswith("}") else "name"
+        return [{"cmd": verb, key: rest[0]}]
+
+    if verb == "list" and not rest:
+        return [{"cmd": "list"}]
+
+    raise ValueError(f"无法识别的参数：{' '.join(argv)}")
+
+
+def forward(commands, name=None, timeout=0.5):
+    """把命令转发给正在运行的实例
+
+    没有实例在运行时返回None，否则返回每条命令的响应。
+    """
+    client = ControlClient(name, timeout)
+    try:
+        client.connect()
+    except OSError:
+        return None
+    with client:
+        return client.batch(commands)
+
+
+def forward_command_line(argv, name=None):
+    """已有实例在运行时把命令行参数转发给它并输出结果
+
+    返回进程退出码；没有实例在运行时返回None，由调用方正常启动程序。
+    无法识别的参数（Qt的 -platform、文件路径等）不拦截：没有实例时照常启动，
+    有实例时只激活它。
+    """
+    unknown = None
+    try:
+        commands = parse_command_line(argv)
+    except ValueError as e:
+        unknown = e
+        commands = [{"cmd": "activate"}]
+
+    try:
+        responses = forward(commands, name)
+    except (OSError, ValueError) as e:
+        print(f"转发命令失败：{e}", file=sys.stderr)
+        return 1
+    if responses is None:
+        return None
+    if unknown is not None:
+        print(f"已激活正在运行的实例，忽略参数：{unknown}", file=sys.stderr)
+
+    code = 0
+    for command, response in zip(commands, responses):
+        if not response.get("ok"):
+            print(f"{command['cmd']} 失败：{response.get('error')}", file=sys.stderr)
+            code = 1
+        elif command["cmd"] == "list":
+            for task in response["result"]:
+                state = f"剩余 {task['remaining_seconds']} 秒" if task["running"] else "未运行"
+                print(f"{task['id']}  {task['name']}  {state}")
+        elif command["cmd"] == "create":
+            print(response["result"]["id"])
+    return code
+
+
+def main():
+    """命令行：python control.py '{"cmd": "list"}' ...，--events 持续输出到期事件"""
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        return 2
+
+    try:
+        with ControlClient() as client:
+            for arg in args:
+                if arg == "--events":
+                    for event in client.events():
+                        print(json.dumps(event, ensure_ascii=False), flush=True)
+                    continue
+                start = time.perf_counter()
+                request = json.loads(arg)
+                response = client.request(request.pop("cmd", None), **request)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(json.dumps(response, ensure_ascii=False))
+                print(f"（{elapsed:.2f} ms）", file=sys.stderr)
+    except OSError as e:
+        print(f"无法连接到倒计时器：{e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
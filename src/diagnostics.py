@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""运行时诊断
+
+记录关键路径的耗时分布（直方图）、定时器唤醒抖动和到期到提醒的延迟，
+可以导出为JSON。设置环境变量 COUNTDOWN_TIMER_PROFILE=文件名 时
+用 cProfile 记录整个运行过程，退出时写入该文件（可用 pstats 或 snakeviz 查看）。
+不依赖Qt。
+"""
+
+import os
+import time
+import bisect
+import functools
+from collections import deque
+
+from storage import atomic_write_json
+
+PROFILE_ENV = "COUNTDOWN_TIMER_PROFILE"
+
+
+class LatencyHistogram:
+    """耗时直方图，按对数刻度分桶，并保留最近的样本用于计算分位数"""
+
+    # 桶的上界（毫秒），最后一个桶收集超过1秒的样本
+    BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+    RECENT = 1000
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent = deque(maxlen=self.RECENT)
+
+    def record(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.recent.append(ms)
+
+    def percentile(self, q):
+        """最近样本的分位数（毫秒），没有样本时返回None"""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else None
+
+    def to_dict(self):
+        labels = [f"<={bound}ms" for bound in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class Diagnostics:
+    """按名称收集的耗时直方图"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = time.time()
+        self.histograms = {}
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def record(self, name, seconds):
+        """记录一次耗时或延迟（秒）"""
+        self.histogram(name).record(seconds)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def to_dict(self, extra=None):
+        data = {
+            "started": self.started,
+            "uptime_seconds": time.time() - self.started,
+            "histograms": {name: h.to_dict() for name, h in sorted(self.histograms.items())},
+        }
+        if extra:
+            data.update(extra)
+        return data
+
+    def dump(self, path, extra=None):
+        """把全部统计写入JSON文件"""
+        atomic_write_json(path, self.to_dict(extra))
+
+
+def instrumented(name):
+    """方法装饰器：把每次调用的耗时记录到 self.diagnostics 的 name 直方图"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                self.diagnostics.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def start_profiler():
+    """设置了 COUNTDOWN_TIMER_PROFILE 时启动cProfile，返回 (profiler, 输出文件) 或None"""
+    path = os.environ.get(PROFILE_ENV)
+    if not path:
+        return None
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler, path
+
+
+def stop_profiler(profiling):
+    """停止cProfile并写入统计文件"""
+    if profiling is None:
+        return
+    profiler, path = profiling
+    profiler.disable()
+    profiler.dump_stats(path)
+    print(f"性能分析结果已写入 {path}")
@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""计时引擎
+
+不依赖Qt和pygame的纯Python计时核心：任务、任务登记表和基于截止时间的调度。
+界面只订阅引擎事件，引擎本身可以在无显示的环境中单独运行和压测。
+大批量任务可以使用列式存储 TaskColumns，安装了NumPy时以向量化方式计算。
+"""
+
+import heapq
+import math
+import time
+import uuid
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+MAX_HOURS = 99  # 与编辑对话框的上限一致
+MAX_SECONDS = MAX_HOURS * 3600 + 59 * 60 + 59  # 单个倒计时的最长时长
+
+
+def new_task_id():
+    """生成任务ID，格式与之前使用的QUuid字符串一致"""
+    return "{%s}" % uuid.uuid4()
+
+
+class Task:
+    """任务类，表示一个倒计时任务"""
+    __slots__ = (
+        "id", "name", "hours", "minutes", "seconds", "reminder_text", "audio_file",
+        "enabled", "_remaining_seconds", "deadline", "running", "resume_deadline"
+    )
+
+    def __init__(self, name="", hours=0, minutes=0, seconds=0, reminder_text="", audio_file="", enabled=True):
+        self.id = new_task_id()
+        self.name = name
+        self.hours = hours
+        self.minutes = minutes
+        self.seconds = seconds
+        self.reminder_text = reminder_text
+        self.audio_file = audio_file
+        self.enabled = enabled
+        self._remaining_seconds = 0
+        self.deadline = None  # 运行时的单调时钟截止时间
+        self.running = False
+        self.resume_deadline = None  # 从配置恢复的墙上时钟截止时间，由 TimerEngine.resume() 处理
+
+    @property
+    def total_seconds(self):
+        """计算任务总秒数"""
+        return self.hours * 3600 + self.minutes * 60 + self.seconds
+
+    @property
+    def remaining_seconds(self):
+        """剩余秒数，运行中根据截止时间计算"""
+        if self.running and self.deadline is not None:
+            return max(0, math.ceil(self.deadline - time.monotonic()))
+        return self._remaining_seconds
+
+    @remaining_seconds.setter
+    def remaining_seconds(self, value):
+        self._remaining_seconds = value
+
+    @property
+    def wall_deadline(self):
+        """运行中任务的墙上时钟截止时间，单调时钟在重启后不再有意义"""
+        if self.running and self.deadline is not None:
+            return time.time() + (self.deadline - time.monotonic())
+        return None
+
+    def to_dict(self):
+        """将任务转换为字典，用于保存配置
+
+        运行中的任务额外保存墙上时钟截止时间 deadline，重启后据此恢复。
+        """
+        data = {
+            "id": self.id,
+            "name": self.name,
+            "hours": self.hours,
+            "minutes": self.minutes,
+            "seconds": self.seconds,
+            "reminder_text": self.reminder_text,
+            "audio_file": self.audio_file,
+            "enabled": self.enabled
+        }
+        deadline = self.wall_deadline
+        if deadline is not None:
+            data["deadline"] = deadline
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典创建任务，用于加载配置"""
+        task = cls(
+            name=data.get("name", ""),
+            hours=data.get("hours", 0),
+            minutes=data.get("minutes", 0),
+            seconds=data.get("seconds", 0),
+            reminder_text=data.get("reminder_text", ""),
+            audio_file=data.get("audio_file", ""),
+            enabled=data.get("enabled", True)
+        )
+        task.id = data.get("id") or new_task_id()
+        deadline = data.get("deadline")
+        if isinstance(deadline, (int, float)) and not isinstance(deadline, bool):
+            task.resume_deadline = float(deadline)
+        return task
+
+
+class TaskRegistry:
+    """任务登记表：保持任务顺序，同时按ID和行号建立索引"""
+
+    def __init__(self, tasks=None):
+        self.reset(tasks or [])
+
+    def reset(self, tasks):
+        """替换全部任务并重建索引"""
+        self.tasks = []
+        self._by_id = {}
+        self._rows = {}
+        for task in tasks:
+            # 手动编辑的配置中可能出现重复ID，只保留第一个
+            if task.id not in self._by_id:
+                self.append(task)
+
+    def append(self, task):
+        """在末尾添加任务"""
+        self._rows[task.id] = len(self.tasks)
+        self._by_id[task.id] = task
+        self.tasks.append(task)
+
+    def remove(self, task):
+        """移除任务，并更新其后任务的行号"""
+        row = self._rows.pop(task.id)
+        del self._by_id[task.id]
+        del self.tasks[row]
+        for i in range(row, len(self.tasks)):
+            self._rows[self.tasks[i].id] = i
+
+    def get(self, task_id):
+        """按ID查找任务"""
+        return self._by_id.get(task_id)
+
+    def row_of(self, task):
+        """返回任务所在行号，不存在时返回None"""
+        return self._rows.get(task.id)
+
+    def __contains__(self, task):
+        return self._by_id.get(task.id) is task
+
+    def __getitem__(self, row):
+        return self.tasks[row]
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def __len__(self):
+        return len(self.tasks)
+
+
+class TimerEngine:
+    """基于截止时间的计时引擎
+
+    运行中的任务以单调时钟的绝对截止时间存入最小堆，next_deadline() 给出
+    最近的到期时间，advance() 取出所有已到期的任务，空闲时不做任何遍历。
+    状态变化通过订阅的回调通知：
+        started(task)、stopped(task)、finished(task, deadline)、
+        added(task)、removed(task)
+    """
+
+    EVENTS = ("started", "stopped", "finished", "added", "removed")
+    HEAP_SLACK = 64  # 堆中失效条目超过运行中任务数加该值时重建堆
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.tasks = TaskRegistry()
+        self.running_tasks = {}  # 任务ID -> 运行中的任务
+        self._heap = []  # (截止时间, 序号, 任务)
+        self._seq = 0
+        self._current = {}  # 任务ID -> 当前有效堆条目的序号
+        self._listeners = {event: [] for event in self.EVENTS}
+
+    def subscribe(self, event, callback):
+        """订阅引擎事件"""
+        self._listeners[event].append(callback)
+
+    def unsubscribe(self, event, callback):
+        self._listeners[event].remove(callback)
+
+    def _emit(self, event, *args):
+        for callback in list(self._listeners[event]):
+            callback(*args)
+
+    def add_task(self, task):
+        """登记任务"""
+        self.tasks.append(task)
+        self._emit("added", task)
+
+    def remove_task(self, task):
+        """移除任务，运行中的任务会先停止"""
+        if task.running:
+            self.stop(task)
+        self.tasks.remove(task)
+        self._emit("removed", task)
+
+    def start(self, task, seconds=None):
+        """开始任务，在seconds秒后到期，默认为任务的总时长"""
+        if not task.enabled:
+            return False
+
+        seconds = task.total_seconds if seconds is None else seconds
+        task.remaining_seconds = seconds
+        task.deadline = self.clock() + seconds
+        task.running = True
+        self.running_tasks[task.id] = task
+
+        self._seq += 1
+        self._current[task.id] = self._seq
+        heapq.heappush(self._heap, (task.deadline, self._seq, task))
+        self._compact()
+        self._emit("started", task)
+        return True
+
+    def stop(self, task):
+        """停止任务，堆中的旧条目在出堆时惰性丢弃"""
+        task.running = False
+        task.deadline = None
+        self.running_tasks.pop(task.id, None)
+        self._current.pop(task.id, None)
+        self._compact()
+        self._emit("stopped", task)
+
+    def _compact(self):
+        """反复重启或停止远期任务时失效条目不会很快出堆，数量过多时重建堆"""
+        if len(self._heap) > 2 * len(self.running_tasks) + self.HEAP_SLACK:
+            self._heap = [entry for entry in self._heap if self._is_current(entry)]
+            heapq.heapify(self._heap)
+
+    def resume(self, tasks, wall_now=None):
+        """恢复从配置加载的运行中任务
+
+        按保存的墙上时钟截止时间重新开始，已经过期的任务统一到期，
+        finished 事件在所有任务恢复之后一次性分发。返回过期的任务。
+        """
+        wall_now = time.time() if wall_now is None else wall_now
+        now = self.clock()
+        resumed = False
+        for task in tasks:
+            deadline, task.resume_deadline = task.resume_deadline, None
+            if deadline is not None and not task.running and task in self.tasks:
+                resumed = self.start(task, seconds=deadline - wall_now) or resumed
+        return self.advance(now) if resumed else []
+
+    def _is_current(self, entry):
+        """判断堆条目是否仍然有效"""
+        # 按序号判断，同一时刻重新开始的任务截止时间相同，不能用截止时间区分
+        _, seq, task = entry
+        return self.running_tasks.get(task.id) is task and self._current.get(task.id) == seq
+
+    def next_deadline(self):
+        """最近的有效截止时间，没有运行中的任务时返回None"""
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def advance(self, now=None):
+        """处理所有在now之前到期的任务，返回这些任务"""
+        now = self.clock() if now is None else now
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._is_current(entry):
+                task = entry[2]
+                self.running_tasks.pop(task.id, None)
+                self._current.pop(task.id, None)
+                task.running = False
+                task.deadline = None
+                task.remaining_seconds = 0
+                expired.append((task, entry[0]))
+
+        # 先更新所有任务的状态，再分发到期事件
+        for task, deadline in expired:
+            self._emit("finished", task, deadline)
+        return [task for task, _ in expired]
+
+    def run(self, sleep=time.sleep, stop_when_idle=True):
+        """在当前线程中运行调度循环，用于无界面运行"""
+        while True:
+            deadline = self.next_deadline()
+            if deadline is None:
+                if stop_when_idle:
+                    return
+                sleep(1)
+                continue
+
+            delay = deadline - self.clock()
+            if delay > 0:
+                sleep(delay)
+            self.advance()
+
+
+class TaskColumns:
+    """列式任务存储
+
+    截止时间、状态和时长按槽位保存在连续数组中（安装了NumPy时为ndarray，
+    否则为 array.array），找出到期任务或计算全部剩余时间只需一次遍历。
+    删除的槽位会被重复使用。displayed 记录每个槽位上次显示的剩余秒数，
+    tick() 只返回显示值发生变化的槽位。
+    """
+
+    IDLE, RUNNING, FINISHED = 0, 1, 2
+
+    def __init__(self, capacity=1024, use_numpy=None):
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        elif use_numpy and numpy is None:
+            raise ImportError("TaskColumns(use_numpy=True) 需要安装NumPy")
+        self.use_numpy = use_numpy
+
+        self.capacity = 0
+        self.size = 0  # 已使用过的最大槽位数
+        if use_numpy:
+            self.deadlines = numpy.zeros(0, dtype=numpy.float64)
+            self.states = numpy.zeros(0, dtype=numpy.int8)
+            self.durations = numpy.zeros(0, dtype=numpy.int32)
+            self.displayed = numpy.zeros(0, dtype=numpy.int32)
+        else:
+            self.deadlines = array('d')
+            self.states = array('b')
+            self.durations = array('l')
+            self.displayed = array('l')
+        self.ids = []  # 槽位 -> 任务ID，空槽位为None
+        self.slots = {}  # 任务ID -> 槽位
+        self._free = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        """扩容到至少capacity个槽位"""
+        if capacity <= self.capacity:
+            return
+        extra = capacity - self.capacity
+        if self.use_numpy:
+            self.deadlines = numpy.concatenate([self.deadlines, numpy.zeros(extra, dtype=numpy.float64)])
+            self.states = numpy.concatenate([self.states, numpy.zeros(extra, dtype=numpy.int8)])
+            self.durations = numpy.concatenate([self.durations, numpy.zeros(extra, dtype=numpy.int32)])
+            self.displayed = numpy.concatenate([self.displayed, numpy.full(extra, -1, dtype=numpy.int32)])
+        else:
+            self.deadlines.extend(array('d', bytes(8 * extra)))
+            self.states.extend(array('b', bytes(extra)))
+            self.durations.extend([0] * extra)
+            self.displayed.extend([-1] * extra)
+        self.ids.extend([None] * extra)
+        self.capacity = capacity
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, task_id):
+        return task_id in self.slots
+
+    def add(self, task_id, duration):
+        """添加任务，返回其槽位"""
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow(max(1024, self.capacity * 2))
+            slot = self.size
+            self.size += 1
+
+        self.ids[slot] = task_id
+        self.slots[task_id] = slot
+        self.durations[slot] = duration
+        self.deadlines[slot] = 0.0
+        self.states[slot] = self.IDLE
+        self.displayed[slot] = -1
+        return slot
+
+    def remove(self, task_id):
+        """移除任务并回收槽位"""
+        slot = self.slots.pop(task_id)
+        self.ids[slot] = None
+        self.states[slot] = self.IDLE
+        self.displayed[slot] = -1
+        self._free.append(slot)
+
+    def start(self, task_id, now, seconds=None):
+        """开始任务，默认时长为添加时的时长"""
+        slot = self.slots[task_id]
+        seconds = self.durations[slot] if seconds is None else seconds
+        self.deadlines[slot] = now + seconds
+        self.states[slot] = self.RUNNING
+
+    def stop(self, task_id):
+        self.states[self.slots[task_id]] = self.IDLE
+
+    def deadline(self, task_id):
+        """运行中任务的截止时间，未运行时返回None"""
+        slot = self.slots[task_id]
+        return float(self.deadlines[slot]) if self.states[slot] == self.RUNNING else None
+
+    def expired(self, now):
+        """找出在now之前到期的运行中任务，标记为已完成并返回它们的ID"""
+        n = self.size
+        if self.use_numpy:
+            states = self.states[:n]
+            slots = numpy.flatnonzero((states == self.RUNNING) & (self.deadlines[:n] <= now))
+            states[slots] = self.FINISHED
+            return [self.ids[slot] for slot in slots.tolist()]
+
+        states, deadlines, running = self.states, self.deadlines, self.RUNNING
+        slots = [i for i in range(n) if states[i] == running and deadlines[i] <= now]
+        for slot in slots:
+            states[slot] = self.FINISHED
+        return [self.ids[slot] for slot in slots]
+
+    def remaining(self, now):
+        """计算全部槽位的剩余秒数，未运行的槽位为-1"""
+        n = self.size
+        if self.use_numpy:
+            seconds = numpy.maximum(numpy.ceil(self.deadlines[:n] - now), 0).astype(numpy.int64)
+            seconds[self.states[:n] != self.RUNNING] = -1
+            return seconds
+
+        states, deadlines, running, ceil = self.states, self.deadlines, self.RUNNING, math.ceil
+        return array('l', [
+            max(0, ceil(deadlines[i] - now)) if states[i] == running else -1
+            for i in range(n)
+        ])
+
+    def tick(self, now):
+        """批量刷新：一次计算全部剩余时间和到期任务
+
+        返回 (到期任务ID列表, 显示值变化的槽位, 对应的新剩余秒数)，
+        未运行和刚到期的槽位显示值为-1。
+        """
+        n = self.size
+        if self.use_numpy:
+            deadlines, states, displayed = self.deadlines[:n], self.states[:n], self.displayed[:n]
+            running = states == self.RUNNING
+
+            expired_slots = numpy.flatnonzero(running & (deadlines <= now))
+            states[expired_slots] = self.FINISHED
+            running[expired_slots] = False
+
+            remaining = numpy.ceil(deadlines - now)
+            numpy.maximum(remaining, 0, out=remaining)
+            remaining = remaining.astype(numpy.int32)
+            remaining[~running] = -1
+
+            changed = numpy.flatnonzero(remaining != displayed)
+            values = remaining[changed]
+            displayed[changed] = values
+            return [self.ids[slot] for slot in expired_slots.tolist()], changed, values
+
+        states, deadlines, displayed = self.states, self.deadlines, self.displayed
+        running, finished, ceil = self.RUNNING, self.FINISHED, math.ceil
+        expired, changed, values = [], array('l'), array('l')
+        for i in range(n):
+            value = -1
+            if states[i] == running:
+                if deadlines[i] <= now:
+                    states[i] = finished
+                    expired.append(self.ids[i])
+                else:
+                    value = ceil(deadlines[i] - now)
+            if value != displayed[i]:
+                displayed[i] = value
+                changed.append(i)
+                values.append(value)
+        return expired, changed, values
+
+
+class BatchTicker:
+    """批量刷新模式的无界面调度器
+
+    每次刷新对 TaskColumns 中的全部任务做一次（向量化）计算，
+    通过订阅的回调通知：
+        finished(任务ID列表)、changed(槽位, 剩余秒数)
+    只有显示值变化的槽位才会出现在 changed 中。
+    """
+
+    EVENTS = ("finished", "changed")
+
+    def __init__(self, columns, clock=time.monotonic):
+        self.columns = columns
+        self.clock = clock
+        self._listeners = {event: [] for event in self.EVENTS}
+
+    def subscribe(self, event, callback):
+        """订阅刷新事件"""
+        self._listeners[event].append(callback)
+
+    def unsubscribe(self, event, callback):
+        self._listeners[event].remove(callback)
+
+    def tick(self, now=None):
+        """刷新一次，返回到期的任务ID"""
+        now = self.clock() if now is None else now
+        expired, changed, values = self.columns.tick(now)
+        if len(changed):
+            for callback in list(self._listeners["changed"]):
+                callback(changed, values)
+        if expired:
+            for callback in list(self._listeners["finished"]):
+                callback(expired)
+        return expired
+
+    def run(self, interval=1.0, sleep=time.sleep, stop_when_idle=True):
+        """按固定间隔刷新，对齐到间隔边界"""
+        start = self.clock()
+        ticks = 0
+        while True:
+            self.tick()
+            if stop_when_idle and not self._has_running():
+                return
+            ticks += 1
+            delay = start + ticks * interval - self.clock()
+            if delay > 0:
+                sleep(delay)
+
+    def _has_running(self):
+        states = self.columns.states[:self.columns.size]
+        if self.columns.use_numpy:
+            return bool((states == TaskColumns.RUNNING).any())
+        return TaskColumns.RUNNING in states
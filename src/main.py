@@ -2,23 +2,142 @@
 # -*- coding: utf-8 -*-
 
 import os
+import csv
 import sys
-import json
-import glob
-import threading
+import math
 import time
+from collections import deque
+from itertools import islice
 from datetime import timedelta
 
+STARTUP_BEGIN = time.perf_counter()  # 用于统计启动耗时
+
+if __name__ == "__main__":
+    # 已有实例在运行时把命令行转发给它后立即退出，不导入Qt和pygame
+    from control import forward_command_line
+    FORWARD_CODE = forward_command_line(sys.argv[1:])
+    if FORWARD_CODE is not None:
+        sys.exit(FORWARD_CODE)
+
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QLabel, QPushButton, QSpinBox, QComboBox, QFrame, QMessageBox,
-    QDialog, QStyleFactory, QGroupBox, QLineEdit, QListWidget, QListWidgetItem,
-    QFormLayout, QDialogButtonBox, QCheckBox, QGridLayout, QScrollBar, QAbstractItemView
+    QDialog, QStyleFactory, QGroupBox, QLineEdit, QListView, QStyledItemDelegate,
+    QFormLayout, QDialogButtonBox, QCheckBox, QGridLayout, QScrollBar, QAbstractItemView,
+    QFileDialog, QPlainTextEdit
+)
+from PySide6.QtCore import (
+    Qt, QObject, QTimer, Signal, Slot, QSize, QRect, QRectF, QEvent, QPropertyAnimation, Property,
+    QEasingCurve, QPoint, QAbstractListModel, QModelIndex, QFileSystemWatcher
 )
-from PySide6.QtCore import Qt, QTimer, Signal, Slot, QSize, QPropertyAnimation, Property, QEasingCurve, QPoint, QUuid
-from PySide6.QtGui import QIcon, QFont, QColor, QPalette, QLinearGradient, QGradient, QFontDatabase, QPainter, QPen
+from PySide6.QtNetwork import QLocalServer
+from PySide6.QtGui import (
+    QIcon, QCursor, QFont, QFontMetrics, QColor, QPalette, QLinearGradient, QGradient, QFontDatabase,
+    QPainter, QPainterPath, QPen, QShortcut, QKeySequence
+)
+
+from audio import AudioWorker, AudioIndex
+from engine import Task, TimerEngine
+from storage import open_store
+from transfer import import_tasks, export_tasks
+from diagnostics import Diagnostics, instrumented, start_profiler, stop_profiler
+from control import ControlDispatcher, server_name, encode, ping, parse_command_line, forward_command_line
+
+IMPORTS_DONE = time.perf_counter()
+
+# 剩余时间颜色分段：少于10秒红色，少于30秒橙色，其余绿色
+REMAIN_BAND_COLORS = ("#FF5252", "#FFA000", "#00C853")
+
+def remain_band(seconds):
+    """返回剩余时间所在的颜色分段"""
+    if seconds < 10:
+        return 0
+    if seconds < 30:
+        return 1
+    return 2
+
+class StartupTimer:
+    """记录启动各阶段的耗时，便于发现启动变慢"""
+
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.phases = []  # (阶段名, 毫秒)
+
+    def mark(self, name, now=None):
+        """记录从上一阶段结束到现在的耗时"""
+        now = time.perf_counter() if now is None else now
+        self.phases.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    @property
+    def total_ms(self):
+        return (self.last - self.start) * 1000
+
+    def report(self):
+        details = "，".join(f"{name} {ms:.0f}ms" for name, ms in self.phases)
+        print(f"启动耗时 {self.total_ms:.0f}ms：{details}")
+
+class FirstPaintFilter(QObject):
+    """窗口第一次绘制完成后调用一次回调
+
+    零超时的定时器通常在平台的显示和绘制事件之前就会执行，不能代表首帧。
+    这里在窗口收到第一个绘制事件时再排队回调，回调运行时首帧已经画完。
+    窗口一直没有绘制（例如最小化启动）时，超时后也会调用。
+    """
+
+    TIMEOUT_MS = 1000
+
+    def __init__(self, widget, callback):
+        super().__init__(widget)
+        self.widget = widget
+        self.callback = callback
+        self.done = False
+        widget.installEventFilter(self)
+        QTimer.singleShot(self.TIMEOUT_MS, self._fire)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self.done:
+            QTimer.singleShot(0, self._fire)
+        return False
+
+    def _fire(self):
+        if self.done:
+            return
+        self.done = True
+        self.widget.removeEventFilter(self)
+        self.callback()
+
+class WakeupMeter:
+    """统计定时器唤醒次数，用于确认空闲时不再唤醒"""
+
+    WINDOW = 60.0  # 统计最近一分钟
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.total = 0
+        self._recent = deque()
+
+    def record(self):
+        now = self.clock()
+        self.total += 1
+        self._recent.append(now)
+        self._trim(now)
 
-import pygame
+    def per_minute(self):
+        """最近一分钟的唤醒次数"""
+        self._trim(self.clock())
+        return len(self._recent)
+
+    def _trim(self, now):
+        while self._recent and self._recent[0] <= now - self.WINDOW:
+            self._recent.popleft()
+
+def format_seconds(seconds):
+    """将秒数格式化为 时:分:秒"""
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
 
 class ConfirmDialog(QDialog):
     def __init__(self, parent=None, reminder_text="倒计时结束了！"):
@@ -58,6 +177,7 @@ class ConfirmDialog(QDialog):
         user_reminder_label.setStyleSheet("font-size: 20px; color: #FFA000; font-weight: bold; padding: 10px;")
         user_reminder_label.setAlignment(Qt.AlignCenter)
         user_reminder_label.setWordWrap(True)
+        self.reminder_label = user_reminder_label
         
         # 按钮部分 - 使用单独的布局并添加顶部间距
         button_layout = QHBoxLayout()
@@ -99,6 +219,11 @@ class ConfirmDialog(QDialog):
         
         # 创建按钮振动动画效果
         self.createButtonAnimation()
+    
+    def set_text(self, text):
+        """更新提醒文字"""
+        self.reminder_text = text
+        self.reminder_label.setText(text)
         
     def createButtonAnimation(self):
         """创建按钮振动动画效果"""
@@ -106,9 +231,17 @@ class ConfirmDialog(QDialog):
         self.anim.setDuration(80)
         self.anim.setLoopCount(8)  # 振动4次(来回8次)
         
+        # 每1.8秒重复振动一次的计时器，在关键帧设置好后启动
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.restartAnimation)
+        
         # 等待按钮完全渲染后再获取位置
         # 使用一个小的延迟来确保位置已正确计算
-        QTimer.singleShot(100, self._setupAnimation)
+        # 计时器作为子对象，对话框提前关闭销毁时不会再回调
+        self.setup_timer = QTimer(self)
+        self.setup_timer.setSingleShot(True)
+        self.setup_timer.timeout.connect(self._setupAnimation)
+        self.setup_timer.start(100)
     
     def _setupAnimation(self):
         """设置动画关键帧"""
@@ -131,8 +264,6 @@ class ConfirmDialog(QDialog):
         self.anim.start()
         
         # 每1.8秒重复振动一次
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.restartAnimation)
         self.timer.start(1800)
     
     def restartAnimation(self):
@@ -142,6 +273,7 @@ class ConfirmDialog(QDialog):
             
     def closeEvent(self, event):
         """关闭窗口时停止动画和计时器"""
+        self.setup_timer.stop()
         self.timer.stop()
         self.anim.stop()
         super().closeEvent(event)
@@ -226,10 +358,369 @@ class CountdownButton(QPushButton):
         c.setHsl(h, s, l, a)
         return c.name()
 
+class TaskScheduler(QObject):
+    """把计时引擎接入Qt事件循环
+
+    只为引擎最近的一个截止时间启动单次定时器，空闲时不做任何遍历，
+    任务的开始、停止和到期都由 TimerEngine 处理。
+    """
+
+    MAX_INTERVAL_MS = 2 ** 31 - 1  # QTimer 支持的最长间隔
+
+    def __init__(self, engine, parent=None, wakeups=None, diagnostics=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.wakeups = wakeups
+        self.diagnostics = diagnostics
+        self._expected = None  # 计划唤醒的时间，用于统计抖动
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+        engine.subscribe("started", self._on_changed)
+        engine.subscribe("stopped", self._on_changed)
+
+    def _on_changed(self, _task):
+        self.rearm()
+
+    def rearm(self):
+        """为最近的截止时间重新设置单次定时器"""
+        deadline = self.engine.next_deadline()
+        if deadline is None:
+            self._timer.stop()
+            return
+
+        now = self.engine.clock()
+        # QTimer的间隔为32位毫秒数，更远的截止时间先等待最大间隔，醒来后重新设置
+        delay_ms = min(max(0, math.ceil((deadline - now) * 1000)), self.MAX_INTERVAL_MS)
+        self._expected = now + delay_ms / 1000
+        self._timer.start(delay_ms)
+
+    def _on_timeout(self):
+        """处理所有已到期的任务"""
+        if self.wakeups is not None:
+            self.wakeups.record()
+        if self.diagnostics is not None and self._expected is not None:
+            self.diagnostics.record("scheduler_jitter", abs(self.engine.clock() - self._expected))
+        self.engine.advance()
+        self.rearm()
+
+class DisplayClock(QObject):
+    """剩余时间显示的自适应时钟
+
+    没有运行中的任务或窗口不可见时完全不唤醒；否则在正在显示的运行中任务里
+    最早的整秒边界唤醒，每次唤醒都正好是某个显示值变化的时刻。
+    各任务的秒边界相位不同时，唤醒间隔不小于 MIN_INTERVAL_MS。
+    """
+    tick = Signal()
+
+    ALIGN_SLACK_MS = 5  # 略晚于整秒边界唤醒，保证显示值已经变化
+    MIN_INTERVAL_MS = 100  # 最多每秒唤醒10次，显示最多滞后这么久
+
+    def __init__(self, engine, parent=None, wakeups=None, diagnostics=None, deadlines=None):
+        super().__init__(parent)
+        self.engine = engine
+        # 返回正在显示的运行中任务的截止时间，为None或返回空列表时对齐到最近截止的任务
+        self.deadlines = deadlines
+        self.wakeups = wakeups
+        self.diagnostics = diagnostics
+        self.active = True  # 窗口是否可见
+        self._expected = None  # 计划唤醒的时间，用于统计抖动
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._on_timeout)
+
+        for event in ("started", "stopped", "finished"):
+            engine.subscribe(event, self._on_changed)
+
+    def _on_changed(self, *_args):
+        self.rearm()
+
+    def set_active(self, active):
+        """窗口可见时才唤醒"""
+        self.active = active
+        self.rearm()
+
+    def stop(self):
+        self._timer.stop()
+
+    def rearm(self):
+        """在正在显示的任务中最早的下一个整秒边界唤醒"""
+        deadline = self.engine.next_deadline()
+        if deadline is None or not self.active:
+            self._timer.stop()
+            return
+
+        deadlines = (self.deadlines() if self.deadlines is not None else None) or [deadline]
+        now = self.engine.clock()
+        remaining = [item - now for item in deadlines]
+        delay = min((value - math.floor(value) if value > 0 else 0) for value in remaining)
+        delay_ms = max(int(delay * 1000) + self.ALIGN_SLACK_MS, self.MIN_INTERVAL_MS)
+        self._expected = now + delay_ms / 1000
+        self._timer.start(delay_ms)
+
+    def _on_timeout(self):
+        if self.wakeups is not None:
+            self.wakeups.record()
+        if self.diagnostics is not None and self._expected is not None:
+            self.diagnostics.record("tick_jitter", abs(self.engine.clock() - self._expected))
+        self.tick.emit()
+        self.rearm()
+
+class ControlServer(QObject):
+    """在本地套接字上提供控制接口（协议见 control.py）
+
+    命令在Qt事件循环中直接执行，不经过任何界面操作。
+    启动时先监听以占用套接字名称（保证只运行一个实例），主窗口创建后再用
+    set_host() 接入，在此之前到达的连接保持等待。
+    """
+
+    def __init__(self, host=None, parent=None):
+        super().__init__(parent)
+        self.dispatcher = None
+        self.other_instance = False  # listen() 失败是因为另一个实例正在运行
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)  # 只允许当前用户连接
+        self.server.newConnection.connect(self._on_new_connection)
+        self.connections = {}  # id(连接) -> (连接, 会话)
+        if host is not None:
+            self.set_host(host)
+
+    def set_host(self, host):
+        """接入执行命令的主窗口，并接受等待中的连接"""
+        self.dispatcher = ControlDispatcher(host)
+        self._on_new_connection()
+
+    def listen(self, name=None):
+        """开始监听，另一个实例正在运行时返回False"""
+        name = name or server_name()
+        if self.server.listen(name):
+            return True
+
+        if ping(name):
+            print("另一个倒计时器正在运行，控制接口未启动")
+            self.other_instance = True
+            return False
+
+        # 上次异常退出留下的套接字文件
+        QLocalServer.removeServer(name)
+        if self.server.listen(name):
+            return True
+        print(f"控制接口启动失败：{self.server.errorString()}")
+        return False
+
+    def close(self):
+        for connection, session in list(self.connections.values()):
+            session.close()
+            connection.disconnectFromServer()
+        self.connections.clear()
+        self.server.close()
+        if self.dispatcher is not None:
+            self.dispatcher.close()
+
+    def _on_new_connection(self):
+        if self.dispatcher is None:
+            return
+        while self.server.hasPendingConnections():
+            connection = self.server.nextPendingConnection()
+            session = self.dispatcher.session(lambda message, c=connection: self._send(c, message))
+            self.connections[id(connection)] = (connection, session)
+            connection.readyRead.connect(lambda c=connection: self._on_ready_read(c))
+            connection.disconnected.connect(lambda c=connection: self._on_disconnected(c))
+
+    def _on_ready_read(self, connection):
+        entry = self.connections.get(id(connection))
+        if entry is not None and not entry[1].feed(bytes(connection.readAll())):
+            # 请求过长，不再处理这个连接上的数据
+            self.connections.pop(id(connection))
+            entry[1].close()
+            connection.disconnectFromServer()
+
+    def _send(self, connection, message):
+        connection.write(encode(message))
+        connection.flush()
+
+    def _on_disconnected(self, connection):
+        entry = self.connections.pop(id(connection), None)
+        if entry is not None:
+            entry[1].close()
+        connection.deleteLater()
+
+class AlarmQueue(QObject):
+    """异步提醒队列
+
+    到期任务进入队列后以非模态的ConfirmDialog层叠显示，不会阻塞事件循环，
+    调度器在提醒显示期间照常运行。同时显示的对话框数量有上限，超出的提醒
+    列在一个汇总对话框中，同样立即发出 alarm_shown 开始播放声音，
+    确认前面的对话框后依次单独显示，也可以在汇总对话框中一次全部确认。
+    """
+    alarm_shown = Signal(object)  # 提醒第一次显示（单独或在汇总中）时发出，参数为任务
+    alarm_dismissed = Signal(str)  # 某个提醒被确认时发出，参数为任务ID
+    all_dismissed = Signal()  # 所有提醒都已确认时发出
+
+    MAX_VISIBLE = 5  # 同时单独显示的提醒对话框数量
+    STACK_OFFSET = 30  # 层叠对话框之间的偏移像素
+    SUMMARY_LINES = 8  # 汇总对话框中列出的提醒文字条数
+
+    def __init__(self, window, diagnostics=None):
+        super().__init__(window)
+        self.window = window
+        self.diagnostics = diagnostics
+        self.pending = deque()  # 等待单独显示的 (任务, 截止时间)
+        self.dialogs = {}  # 任务ID -> (对话框, 层叠位置)
+        self.summary = None  # 列出等待中提醒的汇总对话框
+        self.announced = set()  # 已发出 alarm_shown 的任务ID
+        self.latencies = deque(maxlen=1000)  # 截止时间到提醒显示的延迟(秒)
+
+    def enqueue(self, task, deadline=None):
+        """加入一个到期任务的提醒"""
+        self.pending.append((task, deadline))
+        self._drain()
+
+    def active_count(self):
+        """正在显示和排队中的提醒数量"""
+        return len(self.dialogs) + len(self.pending)
+
+    def is_active(self, task_id):
+        """任务的提醒是否仍未确认"""
+        return task_id in self.announced
+
+    def dismiss_all(self):
+        """确认全部提醒"""
+        self._dismiss_pending()
+        for dialog, _slot in list(self.dialogs.values()):
+            dialog.close()
+
+    def _drain(self):
+        """在有空位时单独显示排队中的提醒，其余的列入汇总对话框"""
+        while self.pending and len(self.dialogs) < self.MAX_VISIBLE:
+            task, deadline = self.pending.popleft()
+            if task.id in self.dialogs:
+                # 同一任务的提醒已在显示中
+                continue
+            self._show(task)
+            self._announce(task, deadline)
+
+        for task, deadline in self.pending:
+            self._announce(task, deadline)
+        self._update_summary()
+
+    def _announce(self, task, deadline):
+        """提醒第一次出现在屏幕上：记录延迟并通知播放声音"""
+        if task.id in self.announced:
+            return
+        self.announced.add(task.id)
+
+        if deadline is not None:
+            latency = time.monotonic() - deadline
+            self.latencies.append(latency)
+            if self.diagnostics is not None:
+                self.diagnostics.record("deadline_to_alarm", latency)
+
+        self.alarm_shown.emit(task)
+
+    def _update_summary(self):
+        """更新汇总对话框，没有等待中的提醒时关闭"""
+        if not self.pending:
+            if self.summary is not None:
+                summary, self.summary = self.summary, None
+                summary.close()
+            return
+
+        texts = [task.reminder_text for task, _ in islice(self.pending, self.SUMMARY_LINES)]
+        if len(self.pending) > self.SUMMARY_LINES:
+            texts.append("……")
+        text = f"另有 {len(self.pending)} 个提醒：\n" + "\n".join(texts)
+
+        if self.summary is None:
+            summary = ConfirmDialog(self.window, text)
+            summary.setWindowTitle("更多提醒")
+            summary.ok_button.setText("全部确认并停止播放")
+            summary.setWindowFlags(summary.windowFlags() | Qt.WindowStaysOnTopHint)
+            summary.setAttribute(Qt.WA_DeleteOnClose)
+            summary.setModal(False)
+            summary.finished.connect(lambda _result, dialog=summary: self._on_summary_closed(dialog))
+            self.summary = summary
+            summary.show()
+            self._place(summary, self.MAX_VISIBLE)
+        else:
+            self.summary.set_text(text)
+
+    def _on_summary_closed(self, dialog):
+        """用户确认或关闭了汇总对话框，等待中的提醒全部确认"""
+        if dialog is not self.summary:
+            return
+        self.summary = None
+        self._dismiss_pending()
+
+    def _dismiss_pending(self):
+        pending, self.pending = self.pending, deque()
+        for task, _deadline in pending:
+            if task.id not in self.dialogs:
+                self.announced.discard(task.id)
+                self.alarm_dismissed.emit(task.id)
+        self._update_summary()
+        if not self.dialogs:
+            self.all_dismissed.emit()
+
+    def _place(self, dialog, slot):
+        """以主窗口中心为基准层叠排列"""
+        center = self.window.frameGeometry().center()
+        offset = slot * self.STACK_OFFSET
+        dialog.move(center.x() - dialog.width() // 2 + offset,
+                    center.y() - dialog.height() // 2 + offset)
+
+    def _show(self, task):
+        """以非模态方式显示提醒对话框"""
+        used = {slot for _, slot in self.dialogs.values()}
+        slot = next(i for i in range(self.MAX_VISIBLE) if i not in used)
+
+        dialog = ConfirmDialog(self.window, task.reminder_text)
+        dialog.setWindowFlags(dialog.windowFlags() | Qt.WindowStaysOnTopHint)  # 设置对话框置顶
+        dialog.setAttribute(Qt.WA_DeleteOnClose)
+        dialog.setModal(False)
+        dialog.finished.connect(lambda _result, task_id=task.id: self._dismiss(task_id))
+        self.dialogs[task.id] = (dialog, slot)
+
+        dialog.show()
+        self._place(dialog, slot)
+
+    def _dismiss(self, task_id):
+        """提醒被确认或关闭"""
+        self.dialogs.pop(task_id, None)
+        if not any(task.id == task_id for task, _ in self.pending):
+            self.announced.discard(task_id)
+            self.alarm_dismissed.emit(task_id)
+        self._drain()
+
+        if not self.dialogs and not self.pending:
+            self.all_dismissed.emit()
+
 class CountdownTimer(QMainWindow):
-    def __init__(self):
+    config_save_failed = Signal(str)  # 后台保存配置失败时发出
+    audio_failed = Signal(str)  # 音频初始化失败时发出，参数为错误信息
+    audio_loaded = Signal(str, float)  # 音频解码完成：(路径, 时长秒数)
+    audio_played = Signal(str, bool, float)  # 播放命令已执行：(任务ID, 是否成功, 入队到播放的秒数)
+    audio_finished = Signal(str)  # 提醒声音自行结束或被抢占，参数为任务ID
+    audio_files_changed = Signal(dict, list)  # 音频库变化：(新增 文件名->路径, 删除的文件名)
+    
+    SAVE_DEBOUNCE_MS = 500  # 合并该时间内的多次保存
+    AUDIO_REFRESH_DELAY_MS = 300  # 音频目录变化后等待文件复制完成再检查
+    IMPORT_BATCH_SIZE = 5000  # 批量导入时每批插入模型的任务数
+    FIRST_SCREEN_TASKS = 30  # 启动时立即显示的任务数
+    LOAD_CHUNK_SIZE = 2000  # 其余任务在空闲时每次加载的数量
+    ALARM_FADE_MS = 300  # 确认单个提醒时声音的淡出时间
+    
+    def __init__(self, startup=None, control=None):
         """初始化应用"""
         super().__init__()
+        self.startup = startup or StartupTimer(time.perf_counter())
+        self.diagnostics = Diagnostics()  # 关键路径耗时统计，F12 查看
+        self.diagnostics_dialog = None
         
         # 设置窗口标题和大小
         self.setWindowTitle("倒计时器")
@@ -241,9 +732,6 @@ class CountdownTimer(QMainWindow):
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
         
-        # 初始化pygame mixer用于音频播放
-        pygame.mixer.init()
-        
         # 配置和音频文件目录
         self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.config_dir = os.path.join(os.path.expanduser("~"), ".countdown_timer")
@@ -254,15 +742,65 @@ class CountdownTimer(QMainWindow):
         os.makedirs(self.config_dir, exist_ok=True)
         os.makedirs(self.audio_dir, exist_ok=True)
         
+        # 音频库索引，记录文件信息，避免每次启动扫描目录
+        self.audio_index = AudioIndex(self.audio_dir, os.path.join(self.config_dir, "audio_index.json"))
+        
+        # 预解码的提醒音效缓存和多通道播放都在音频工作线程中，界面线程只发送命令，
+        # pygame混音器在窗口首次绘制后由该线程初始化，之前发送的命令在初始化后执行
+        self.audio = AudioWorker()
+        self.audio_channels = self.audio.channel_count
+        self.audio_error = None  # 音频初始化失败的原因，此时提醒改用系统提示音
+        self._muted_alarms = deque()  # 声音被其他提醒抢占、仍未确认的任务ID
+        self.audio.subscribe("error", self.audio_failed.emit)
+        self.audio.subscribe("loaded", self.audio_loaded.emit)
+        self.audio.subscribe("played", self.audio_played.emit)
+        self.audio.subscribe("finished", self.audio_finished.emit)
+        self.audio_failed.connect(self._on_audio_failed)
+        self.audio_loaded.connect(self.audio_index.set_duration)
+        self.audio_played.connect(self._on_audio_played)
+        self.audio_finished.connect(self._on_alarm_sound_ended)
+        
+        # 配置存储，设置环境变量 COUNTDOWN_TIMER_JOURNAL=1 启用追加式变更日志，
+        # COUNTDOWN_TIMER_STORAGE=sqlite 使用SQLite数据库
+        self.store = open_store(
+            self.config_dir,
+            backend=os.environ.get("COUNTDOWN_TIMER_STORAGE", "json"),
+            use_journal=os.environ.get("COUNTDOWN_TIMER_JOURNAL") == "1",
+            on_error=lambda e: self.config_save_failed.emit(str(e))
+        )
+        self.config_save_failed.connect(self._on_config_save_failed)
+        
+        # 保存防抖定时器，短时间内的多次修改只写入一次
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(self.SAVE_DEBOUNCE_MS)
+        self.save_timer.timeout.connect(self._write_config)
+        
         # 初始化变量
         self.audio_files = {}  # 存储音频文件映射
-        self.tasks = []  # 存储任务列表
-        self.task_items = {}  # 存储任务和对应的UI项
-        
-        # 创建定时器，每秒更新一次
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._update_all_tasks)
-        self.timer.start(1000)  # 1000毫秒 = 1秒
+        # 计时引擎负责任务的开始、停止和到期，界面只订阅它的事件
+        self.engine = TimerEngine()
+        self.engine.subscribe("started", self._on_task_started)
+        self.engine.subscribe("stopped", self._on_task_stopped)
+        self.engine.subscribe("finished", self._task_finished)
+        self.tasks = self.engine.tasks  # 存储任务列表，按ID和行号索引
+        self.task_model = TaskListModel(self.engine, self)  # 任务列表模型
+        
+        # 在Qt事件循环中驱动引擎
+        self.wakeups = WakeupMeter()
+        self.scheduler = TaskScheduler(self.engine, self, wakeups=self.wakeups, diagnostics=self.diagnostics)
+        
+        # 非模态提醒队列
+        self.alarms = AlarmQueue(self, diagnostics=self.diagnostics)
+        self.alarms.alarm_shown.connect(self._on_alarm_shown)
+        self.alarms.alarm_dismissed.connect(self._stop_alarm_sound)
+        self.alarms.all_dismissed.connect(self._on_alarms_dismissed)
+        
+        # 剩余时间显示时钟，只在显示值变化时唤醒
+        self.display_clock = DisplayClock(self.engine, self, wakeups=self.wakeups, diagnostics=self.diagnostics,
+                                          deadlines=self._visible_deadlines)
+        self.display_clock.tick.connect(self._update_all_tasks)
+        self._display_stale = False  # 窗口不可见期间跳过了刷新
         
         # 创建中央部件
         central_widget = QWidget()
@@ -279,15 +817,149 @@ class CountdownTimer(QMainWindow):
         
         # 设置黑暗主题
         self._set_dark_theme()
+        self.startup.mark("界面")
+        
+        # 从索引读取音频文件列表，目录检查推迟到窗口显示之后
+        if self.audio_index.load():
+            self.audio_files = self.audio_index.files()
+        QTimer.singleShot(0, self._refresh_audio_files)
+        
+        # 监视音频目录，新增、删除或重命名文件时增量更新索引
+        self.audio_refresh_timer = QTimer(self)
+        self.audio_refresh_timer.setSingleShot(True)
+        self.audio_refresh_timer.setInterval(self.AUDIO_REFRESH_DELAY_MS)
+        self.audio_refresh_timer.timeout.connect(self._refresh_audio_files)
+        self.audio_watcher = QFileSystemWatcher([self.audio_dir], self)
+        self.audio_watcher.directoryChanged.connect(lambda _path: self.audio_refresh_timer.start())
+        
+        # 加载配置，第一屏任务在首次绘制后填充，其余任务在空闲时分块加载
+        self._loaded_tasks = None
+        self._task_stream = None
+        self._resuming = False
+        self._save_deferred = False  # 加载期间推迟的快照保存
+        self.load_timer = QTimer(self)
+        self.load_timer.timeout.connect(self._load_next_chunk)
+        self._load_config()
+        self.startup.mark("配置")
+        
+        # 本地控制接口，设置环境变量 COUNTDOWN_TIMER_CONTROL=0 关闭；
+        # main() 在创建窗口之前已经开始监听，这里只接入
+        self.control = control
+        if control is not None:
+            control.setParent(self)
+            control.set_host(self)
+        elif os.environ.get("COUNTDOWN_TIMER_CONTROL") != "0":
+            self.control = ControlServer(self, self)
+            self.control.listen()
+    
+    def on_first_frame(self):
+        """窗口首次绘制后填充任务列表并初始化音频"""
+        self.startup.mark("首帧")
+        self._populate_tasks()
+        self.startup.mark("任务列表")
+        self.startup.report()
+        
+        if self._task_stream is not None:
+            self.load_timer.start(0)
+        self.start_audio_init()
+    
+    def _populate_tasks(self):
+        """将加载的第一屏任务填充到列表"""
+        if self._loaded_tasks is None:
+            return
+        tasks, self._loaded_tasks = self._loaded_tasks, None
+        self.task_model.set_tasks(tasks)
+        self._resume_tasks(tasks)
+        self._check_task_audio()
+        if self._task_stream is None:
+            self._flush_deferred_save()
+    
+    def _load_next_chunk(self, size=None):
+        """从配置中继续读取一批任务，全部读完时返回False"""
+        if self._task_stream is None:
+            self.load_timer.stop()
+            return False
         
-        # 刷新音频文件列表
-        self._refresh_audio_files()
+        try:
+            tasks = list(islice(self._task_stream, size or self.LOAD_CHUNK_SIZE))
+        except Exception as e:
+            tasks = []
+            QMessageBox.warning(self, "配置加载错误", f"加载任务时出错：{str(e)}")
+        
+        if tasks:
+            self.task_model.add_tasks(tasks)
+            self._resume_tasks(tasks)
+            return True
+        
+        # 读取完毕
+        self._task_stream = None
+        self.load_timer.stop()
+        self._check_task_audio()
+        self._flush_deferred_save()
+        return False
+    
+    def _resume_tasks(self, tasks):
+        """恢复上次退出时仍在运行的任务，已过期的任务一起到期"""
+        pending = [task for task in tasks if task.resume_deadline is not None]
+        if not pending:
+            return
         
-        # 加载配置
-        self._load_config()
+        # 恢复本身不是状态变化，不需要逐个写入
+        self._resuming = True
+        try:
+            expired = self.engine.resume(pending)
+        finally:
+            self._resuming = False
         
-        # 初始化任务列表
-        self._init_task_list()
+        for task in expired:
+            self._checkpoint(task)
+        print(f"恢复运行中的任务：{len(pending) - len(expired)} 个继续计时，{len(expired)} 个已到期")
+    
+    def _flush_deferred_save(self):
+        """任务全部加载后执行加载期间推迟的保存"""
+        if self._save_deferred:
+            self._save_deferred = False
+            self.save_timer.start()
+    
+    def _ensure_tasks_loaded(self):
+        """立即加载全部任务，用于保存、导入和导出之前"""
+        self._populate_tasks()
+        while self._load_next_chunk():
+            pass
+    
+    def start_audio_init(self):
+        """启动音频工作线程，在其中导入pygame并初始化混音器"""
+        self.audio.start()
+    
+    def _on_audio_failed(self, message):
+        """音频初始化失败，提醒只能使用系统提示音"""
+        self.audio_error = message
+        QMessageBox.warning(self, "音频错误", f"初始化音频失败，提醒将没有声音：{message}")
+    
+    def _on_audio_played(self, task_id, ok, delay):
+        """音频线程执行完播放命令"""
+        if ok:
+            self.diagnostics.record("alarm_sound_start", delay)
+            return
+        print(f"提醒声音未能播放：{task_id}")
+        if self.alarms.is_active(task_id):
+            # 文件无法读取或没有可用通道，至少发出一次系统提示音
+            QApplication.beep()
+    
+    def _on_alarm_sound_ended(self, task_id):
+        """提醒声音被更新的提醒抢占，等有通道空出时重新播放"""
+        if self.alarms.is_active(task_id):
+            print(f"提醒声音被其他提醒占用：{task_id}")
+            self._muted_alarms.append(task_id)
+    
+    def _replay_muted_alarm(self):
+        """有提醒被确认后，为一个仍未确认的静音提醒重新播放声音"""
+        while self._muted_alarms:
+            task_id = self._muted_alarms.popleft()
+            task = self.tasks.get(task_id)
+            if task is not None and task.audio_file and self.alarms.is_active(task_id):
+                self.audio.play(task_id, task.audio_file)
+                return
 
     def _set_dark_theme(self):
         """设置暗黑主题"""
@@ -398,34 +1070,35 @@ class CountdownTimer(QMainWindow):
         task_layout.setSpacing(10)
 
         # 任务列表控件
-        self.task_list = QListWidget()
+        self.task_list = QListView()
         self.task_list.setStyleSheet("""
-            QListWidget {
+            QListView {
                 background-color: #1E1E1E;
                 border: 1px solid #3C3C3C;
                 border-radius: 6px;
                 outline: none;
                 padding: 5px;
             }
-            QListWidget::item {
-                border: none;
-                padding-top: 3px;
-                padding-bottom: 3px;
-            }
-            QListWidget::item:selected {
-                background: transparent;
-                color: inherit;
-                border: none;
-                outline: none;
-            }
         """)
         # 完全禁用垂直和水平滚动条
         self.task_list.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.task_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.task_list.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
-        self.task_list.setIconSize(QSize(0, 0))  # 避免图标带来的额外边距
         self.task_list.setSpacing(3)
-        self.task_list.itemDoubleClicked.connect(self._edit_task)
+        self.task_list.setUniformItemSizes(True)  # 行高固定，无需逐行计算尺寸
+        self.task_list.setSelectionMode(QAbstractItemView.NoSelection)
+        self.task_list.setMouseTracking(True)
+        self.task_list.setModel(self.task_model)
+        # 滚动后可见的任务变了，重新对齐显示时钟
+        self.task_list.verticalScrollBar().valueChanged.connect(lambda _value: self.display_clock.rearm())
+        
+        # 绘制代理负责任务项的显示和按钮点击
+        self.task_delegate = TaskItemDelegate(self.task_list)
+        self.task_delegate.toggle_clicked.connect(self._toggle_task)
+        self.task_delegate.delete_clicked.connect(self._delete_task)
+        self.task_list.setItemDelegate(self.task_delegate)
+        
+        self.task_list.doubleClicked.connect(self._edit_task)
         task_layout.addWidget(self.task_list)
 
         # 添加任务按钮 - 靠右排列
@@ -448,27 +1121,41 @@ class CountdownTimer(QMainWindow):
         """)
         add_task_button.setCursor(Qt.PointingHandCursor)
         add_task_button.clicked.connect(self._add_task)
+        
+        # 批量导入导出按钮
+        transfer_style = """
+            QPushButton {
+                background-color: #3E3E42;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 8px;
+            }
+            QPushButton:hover {
+                background-color: #505055;
+            }
+        """
+        import_button = QPushButton("导入任务")
+        import_button.setStyleSheet(transfer_style)
+        import_button.setCursor(Qt.PointingHandCursor)
+        import_button.clicked.connect(self._import_tasks)
+        button_layout.addWidget(import_button)
+        
+        export_button = QPushButton("导出任务")
+        export_button.setStyleSheet(transfer_style)
+        export_button.setCursor(Qt.PointingHandCursor)
+        export_button.clicked.connect(self._export_tasks)
+        button_layout.addWidget(export_button)
+        
         button_layout.addWidget(add_task_button)
         
         task_layout.addLayout(button_layout)
         
-        # 预先刷新音频文件
-        self._refresh_audio_files()
+        # F12 打开诊断面板
+        QShortcut(QKeySequence(Qt.Key_F12), self, activated=self._show_diagnostics)
         
         return task_group
     
-    def resizeEvent(self, event):
-        """窗口大小变化时更新所有列表项尺寸"""
-        super().resizeEvent(event)
-        self._update_list_items_width()
-    
-    def _update_list_items_width(self):
-        """更新所有列表项的宽度"""
-        width = self.task_list.viewport().width()
-        for task_id, (item, _) in self.task_items.items():
-            current_height = item.sizeHint().height()
-            item.setSizeHint(QSize(width, current_height))
-    
     def _handle_list_resize(self, event):
         """处理列表尺寸变化事件"""
         # 已删除，不再使用
@@ -481,62 +1168,100 @@ class CountdownTimer(QMainWindow):
     
     def _load_config(self):
         """加载配置"""
+        tasks = []
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    
-                    # 加载任务
-                    tasks_data = config.get('tasks', [])
-                    self.tasks = [Task.from_dict(task_data) for task_data in tasks_data]
-                    
-                    # 如果没有任务，添加一个默认任务
-                    if not self.tasks:
-                        self._create_default_task()
-                    
-                    # 加载窗口大小和位置
-                    if 'window' in config:
-                        window_config = config['window']
-                        if all(k in window_config for k in ['x', 'y', 'width', 'height']):
-                            x = window_config['x']
-                            y = window_config['y']
-                            width = window_config['width']
-                            height = window_config['height']
-                            
-                            # 确保窗口位置在屏幕内
-                            screen = QApplication.primaryScreen().geometry()
-                            if (x >= 0 and x < screen.width() - 100 and 
-                                y >= 0 and y < screen.height() - 100 and
-                                width >= self.minimumWidth() and height >= self.minimumHeight()):
-                                self.setGeometry(x, y, width, height)
+            config = self.store.load_settings()
+            if config is not None:
+                # 只立即读取第一屏任务，其余的在空闲时分块加载
+                stream = (Task.from_dict(task_data)
+                          for chunk in self.store.iter_tasks(config, self.LOAD_CHUNK_SIZE,
+                                                             self.FIRST_SCREEN_TASKS)
+                          for task_data in chunk)
+                tasks = list(islice(stream, self.FIRST_SCREEN_TASKS))
+                if len(tasks) == self.FIRST_SCREEN_TASKS:
+                    self._task_stream = stream
+                
+                # 如果没有任务，添加一个默认任务
+                if not tasks:
+                    tasks.append(self._create_default_task())
+                
+                # 加载同时播放的提醒通道数
+                channels = config.get('audio', {}).get('channels')
+                if channels:
+                    self.audio_channels = channels
+                    self.audio.set_channel_count(channels)
+                
+                # 加载窗口大小和位置
+                if 'window' in config:
+                    window_config = config['window']
+                    if all(k in window_config for k in ['x', 'y', 'width', 'height']):
+                        x = window_config['x']
+                        y = window_config['y']
+                        width = window_config['width']
+                        height = window_config['height']
+                        
+                        # 确保窗口位置在屏幕内
+                        screen = QApplication.primaryScreen().geometry()
+                        if (x >= 0 and x < screen.width() - 100 and 
+                            y >= 0 and y < screen.height() - 100 and
+                            width >= self.minimumWidth() and height >= self.minimumHeight()):
+                            self.setGeometry(x, y, width, height)
                                 
         except Exception as e:
             QMessageBox.warning(self, "配置加载错误", f"加载配置时出错：{str(e)}")
-            self._create_default_task()
+            tasks.append(self._create_default_task())
         
-        # 刷新音频文件列表
-        self._refresh_audio_files()
+        self._loaded_tasks = tasks
     
-    def _save_config(self):
-        """保存配置"""
-        try:
-            # 获取当前窗口的几何信息
-            geometry = self.geometry()
-            
-            config = {
-                'tasks': [task.to_dict() for task in self.tasks],
-                'window': {
-                    'x': geometry.x(),
-                    'y': geometry.y(),
-                    'width': geometry.width(),
-                    'height': geometry.height()
-                }
+    def _config_snapshot(self):
+        """生成当前配置的快照，调用前任务必须已全部加载"""
+        # 获取当前窗口的几何信息
+        geometry = self.geometry()
+        
+        return {
+            'tasks': [task.to_dict() for task in self.tasks],
+            'audio': {
+                'channels': self.audio_channels
+            },
+            'window': {
+                'x': geometry.x(),
+                'y': geometry.y(),
+                'width': geometry.width(),
+                'height': geometry.height()
             }
-            
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            QMessageBox.warning(self, "配置保存错误", f"保存配置时出错：{str(e)}")
+        }
+    
+    @instrumented("save_config")
+    def _save_config(self, changed=None, deleted=None):
+        """保存配置
+        
+        存储支持增量写入（变更日志或SQLite）时只写入改动的任务，
+        否则在防抖时间后写入完整快照。
+        """
+        if self.store.incremental and (changed is not None or deleted is not None):
+            if changed is not None:
+                self.store.append({'op': 'upsert', 'task': changed.to_dict()})
+            if deleted is not None:
+                self.store.append({'op': 'delete', 'id': deleted.id})
+            if not self.store.needs_compaction():
+                return
+        
+        self.save_timer.start()
+    
+    @instrumented("write_config")
+    def _write_config(self):
+        """将配置快照交给后台线程写入
+        
+        任务还在分块加载时推迟到加载完成，不为保存同步读取剩余的任务。
+        """
+        if self._loaded_tasks is not None or self._task_stream is not None:
+            self._save_deferred = True
+            return
+        self.store.save(self._config_snapshot())
+    
+    def _on_config_save_failed(self, message):
+        """后台保存失败时提示用户"""
+        QMessageBox.warning(self, "配置保存错误", f"保存配置时出错：{message}")
     
     def _create_default_task(self):
         """创建默认任务"""
@@ -548,77 +1273,125 @@ class CountdownTimer(QMainWindow):
             reminder_text="倒计时结束了！",
             enabled=True
         )
-        self.tasks.append(default_task)
+        return default_task
     
-    def _init_task_list(self):
-        """初始化任务列表"""
-        self.task_list.clear()
-        self.task_items = {}
+    def _add_task(self):
+        """添加新任务"""
+        dialog = TaskEditDialog(self, None, self.audio_files)
         
-        for task in self.tasks:
-            self._add_task_to_list(task)
+        self.audio_files_changed.connect(dialog.update_audio_files)
+        accepted = dialog.exec() == QDialog.Accepted
+        self.audio_files_changed.disconnect(dialog.update_audio_files)
+        
+        if accepted:
+            # 添加任务到列表
+            self.task_model.add_task(dialog.task)
+            
+            # 保存配置
+            self._save_config(changed=dialog.task)
     
-    def _add_task_to_list(self, task):
-        """将任务添加到列表"""
-        # 创建列表项
-        item = QListWidgetItem(self.task_list)
+    def _import_tasks(self):
+        """从JSON Lines或CSV文件批量导入任务"""
+        path, _ = QFileDialog.getOpenFileName(
+            self, "导入任务", "", "任务文件 (*.jsonl *.csv);;所有文件 (*)")
+        if not path:
+            return
+        
+        self._ensure_tasks_loaded()
         
-        # 创建自定义部件
-        widget = TaskListItem(task)
+        # 分批插入模型，导入期间暂停列表重绘
+        added = []  # 已插入模型的每批任务数，读取中途出错时用于保存已导入的部分
         
-        # 设置列表项大小，确保不超出可见区域
-        list_width = self.task_list.viewport().width()
-        item.setSizeHint(QSize(list_width, widget.sizeHint().height()))
+        def add_batch(tasks):
+            self.task_model.add_tasks(tasks)
+            added.append(len(tasks))
         
-        # 设置自定义部件
-        self.task_list.setItemWidget(item, widget)
+        failure = None
+        self.task_list.setUpdatesEnabled(False)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            count, errors = import_tasks(
+                path, add_batch,
+                existing_ids=[task.id for task in self.tasks],
+                batch_size=self.IMPORT_BATCH_SIZE)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            failure = e
+            count, errors = sum(added), []
+        finally:
+            QApplication.restoreOverrideCursor()
+            self.task_list.setUpdatesEnabled(True)
+        
+        if count:
+            self._check_task_audio()
+            self._save_config()
         
-        # 绑定开始/停止按钮事件
-        widget.toggle_button.clicked.connect(lambda checked, t=task, w=widget: self._toggle_task(t, w))
+        if failure is not None:
+            QMessageBox.warning(self, "导入错误", f"读取文件时出错：{str(failure)}\n已导入 {count} 个任务")
+            return
         
-        # 绑定删除按钮事件
-        widget.delete_button.clicked.connect(lambda: self._delete_task(task))
+        for line_no, message in errors:
+            print(f"导入 {path} 第{line_no}行：{message}")
         
-        # 存储任务项映射
-        self.task_items[task.id] = (item, widget)
+        text = f"已导入 {count} 个任务"
+        if errors:
+            box = QMessageBox(QMessageBox.Warning, "导入任务", f"{text}，{len(errors)} 行有错误", parent=self)
+            box.setDetailedText("\n".join(f"第{line_no}行：{message}" for line_no, message in errors))
+            box.exec()
+        else:
+            QMessageBox.information(self, "导入任务", text)
     
-    def _add_task(self):
-        """添加新任务"""
-        dialog = TaskEditDialog(self, None, self.audio_files)
+    def _export_tasks(self):
+        """将全部任务导出为JSON Lines或CSV文件"""
+        path, selected = QFileDialog.getSaveFileName(
+            self, "导出任务", "tasks.jsonl", "JSON Lines (*.jsonl);;CSV (*.csv)")
+        if not path:
+            return
         
-        if dialog.exec() == QDialog.Accepted:
-            # 添加任务到列表
-            self.tasks.append(dialog.task)
-            self._add_task_to_list(dialog.task)
-            
-            # 保存配置
-            self._save_config()
+        self._ensure_tasks_loaded()
+        fmt = "csv" if path.lower().endswith(".csv") or selected.startswith("CSV") else "jsonl"
+        try:
+            count = export_tasks(path, self.tasks, fmt)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "导出错误", f"写入文件时出错：{str(e)}")
+            return
+        print(f"已导出 {count} 个任务到 {path}")
     
-    def _edit_task(self, item):
+    def _edit_task(self, index):
         """编辑任务"""
         # 获取对应的任务
-        for task_id, (list_item, widget) in self.task_items.items():
-            if list_item == item:
-                task = None
-                for t in self.tasks:
-                    if t.id == task_id:
-                        task = t
-                        break
-                
-                if task:
-                    dialog = TaskEditDialog(self, task, self.audio_files)
-                    
-                    # 连接删除按钮信号
-                    dialog.delete_button.clicked.connect(lambda: self._delete_task(task))
-                    
-                    if dialog.exec() == QDialog.Accepted:
-                        # 更新UI
-                        widget.task = task  # 更新引用
-                        widget.update_all()
-                        
-                        # 保存配置
-                        self._save_config()
-                break
+        task = index.data(TaskListModel.TaskRole)
+        if task is None:
+            return
+        
+        # 双击落在按钮上时不打开编辑
+        pos = self.task_list.viewport().mapFromGlobal(QCursor.pos())
+        if self.task_delegate.button_at(self.task_list.visualRect(index), pos, task):
+            return
+        
+        dialog = TaskEditDialog(self, task, self.audio_files)
+        
+        # 连接删除按钮信号，确认删除后关闭对话框
+        def delete():
+            self._delete_task(task)
+            if task not in self.tasks:
+                dialog.reject()
+        dialog.delete_button.clicked.connect(delete)
+        
+        self.audio_files_changed.connect(dialog.update_audio_files)
+        accepted = dialog.exec() == QDialog.Accepted
+        self.audio_files_changed.disconnect(dialog.update_audio_files)
+        
+        # 编辑期间任务可能已被删除（包括通过控制接口），不能再写回
+        if accepted and task in self.tasks:
+            # 运行中的任务可能更换了提醒音频
+            if task.running:
+                self.audio.pin(task.id, task.audio_file)
+            
+            # 更新UI
+            self.task_model.task_changed(task)
+            
+            # 保存配置
+            self._save_config(changed=task)
     
     def _delete_task(self, task):
         """删除任务"""
@@ -629,178 +1402,385 @@ class CountdownTimer(QMainWindow):
         )
         
         if reply == QMessageBox.Yes:
-            # 停止任务
-            if task.running:
-                self._stop_task(task)
-            
-            # 从任务列表移除
-            self.tasks.remove(task)
-            
-            # 从UI中移除
-            if task.id in self.task_items:
-                item, widget = self.task_items[task.id]
-                row = self.task_list.row(item)
-                self.task_list.takeItem(row)
-                del self.task_items[task.id]
-            
-            # 保存配置
-            self._save_config()
+            self.remove_task(task)
     
-    def _toggle_task(self, task, widget):
-        """切换任务状态"""
+    def add_tasks(self, tasks):
+        """添加任务并保存，供控制接口使用"""
+        self.task_model.add_tasks(tasks)
+        for task in tasks:
+            self._save_config(changed=task)
+    
+    def remove_task(self, task):
+        """停止并删除任务，不再确认，供控制接口使用"""
+        if task not in self.tasks:
+            return
+        
+        # 停止任务
+        if task.running:
+            self._stop_task(task)
+        
+        # 从任务列表和UI中移除
+        self.task_model.remove_task(task)
+        
+        # 保存配置
+        self._save_config(deleted=task)
+    
+    def ensure_loaded(self):
+        """确保全部任务都已加载，供控制接口按ID查找任务"""
+        self._ensure_tasks_loaded()
+    
+    def activate(self):
+        """显示并激活窗口，另一个实例启动时由控制接口调用"""
+        if self.isMinimized():
+            self.showNormal()
+        else:
+            self.show()
+        self.raise_()
+        self.activateWindow()
+    
+    def run_command_line(self, argv):
+        """在本实例中执行命令行参数（首次启动时带参数的情况）"""
+        try:
+            commands = parse_command_line(argv)
+        except ValueError as e:
+            # 可能是Qt以外的启动参数（如文件路径），忽略后照常运行
+            print(f"忽略无法识别的命令行参数：{e}")
+            return
+        # 没有控制接口时临时创建一个，用完关闭，不留下引擎事件订阅
+        dispatcher = self.control.dispatcher if self.control is not None else ControlDispatcher(self)
+        try:
+            for command in commands:
+                response = dispatcher.execute(None, dict(command))
+                if not response.get("ok"):
+                    print(f"{command['cmd']} 失败：{response.get('error')}")
+        finally:
+            if self.control is None:
+                dispatcher.close()
+    
+    def _toggle_task(self, task):
+        """切换任务状态，界面由引擎事件更新"""
         if task.running:
             self._stop_task(task)
         else:
             self._start_task(task)
-        
-        # 更新UI
-        widget.update_all()
     
     def _start_task(self, task):
         """开始任务"""
-        if not task.enabled:
-            return
-        
-        # 初始化剩余时间
-        task.remaining_seconds = task.total_seconds
-        task.running = True
+        self.engine.start(task)
     
     def _stop_task(self, task):
         """停止任务"""
-        task.running = False
+        self.engine.stop(task)
+    
+    def _on_task_started(self, task):
+        """任务开始：提前解码提醒音频，到期时直接播放"""
+        self.audio.pin(task.id, task.audio_file)
+        self.task_model.task_changed(task)
+        self._checkpoint(task)
     
+    def _on_task_stopped(self, task):
+        """任务停止"""
+        self.audio.unpin(task.id)
+        self.task_model.task_changed(task)
+        self._checkpoint(task)
+    
+    def _checkpoint(self, task):
+        """任务运行状态变化时保存，重启后可以恢复；每秒的刷新不写入"""
+        if not self._resuming and task in self.tasks:
+            self._save_config(changed=task)
+    
+    @instrumented("update_all_tasks")
     def _update_all_tasks(self):
-        """更新所有任务状态"""
-        for task in self.tasks:
-            if task.running and task.remaining_seconds > 0:
-                # 减少剩余时间
-                task.remaining_seconds -= 1
-                
-                # 更新UI
-                if task.id in self.task_items:
-                    _, widget = self.task_items[task.id]
-                    widget.update_remain_time()
-            
-            # 检查是否到达零
-            if task.running and task.remaining_seconds <= 0:
-                self._task_finished(task)
+        """刷新可见行的剩余时间显示，到期由引擎负责
+
+        窗口隐藏或最小化时不重绘，重新显示时再补刷。
+        """
+        if not self.engine.running_tasks:
+            return
+        if not self._is_displayed():
+            self._display_stale = True
+            return
+
+        rows = self._visible_rows()
+        if rows is not None:
+            self.task_model.refresh_rows(*rows)
+
+    def _is_displayed(self):
+        """窗口是否可见且未最小化"""
+        return self.isVisible() and not self.isMinimized()
+
+    def _visible_rows(self):
+        """返回与任务列表可见区域相交的 (首行, 末行)，没有可见行时返回None"""
+        view = self.task_list
+        if not len(self.tasks):
+            return None
+
+        rect = view.viewport().rect()
+        x = rect.center().x()
+        gap = view.spacing() * 2 + 1  # 行与行之间的空白
+
+        first = view.indexAt(QPoint(x, rect.top()))
+        if not first.isValid():
+            first = view.indexAt(QPoint(x, rect.top() + gap))
+        if not first.isValid():
+            return None
+
+        last = view.indexAt(QPoint(x, rect.bottom()))
+        if not last.isValid():
+            last = view.indexAt(QPoint(x, rect.bottom() - gap))
+        last_row = last.row() if last.isValid() else len(self.tasks) - 1
+        return first.row(), max(first.row(), last_row)
+
+    def _visible_deadlines(self):
+        """可见行中运行中任务的截止时间，供显示时钟对齐"""
+        rows = self._visible_rows()
+        if rows is None:
+            return []
+        first, last = rows
+        tasks = (self.tasks[row] for row in range(first, last + 1))
+        return [task.deadline for task in tasks if task.running]
+
+    def _on_visibility_changed(self):
+        """窗口可见性变化：不可见时停止显示时钟，重新可见时补刷跳过的显示"""
+        displayed = self._is_displayed()
+        if not displayed and self.engine.running_tasks:
+            self._display_stale = True
+        self.display_clock.set_active(displayed)
+
+        if displayed and self._display_stale:
+            self._display_stale = False
+            self._update_all_tasks()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._on_visibility_changed()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._on_visibility_changed()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self._on_visibility_changed()
     
-    def _task_finished(self, task):
-        """任务完成的处理"""
-        task.running = False
+    @instrumented("task_finished")
+    def _task_finished(self, task, deadline):
+        """任务完成的处理，只负责把提醒加入队列"""
+        self.audio.unpin(task.id)
         
         # 更新UI
-        if task.id in self.task_items:
-            _, widget = self.task_items[task.id]
-            widget.update_all()
+        self.task_model.task_changed(task)
+        self._checkpoint(task)
         
-        # 播放音频循环
-        if task.audio_file and os.path.exists(task.audio_file):
-            try:
-                pygame.mixer.music.load(task.audio_file)
-                pygame.mixer.music.play(-1)  # -1表示循环播放
-                
-                # 让任务栏图标闪烁提醒用户
-                QApplication.alert(self, 0)  # 0表示一直闪烁直到用户激活窗口
-                
-                # 将窗口置于前台并激活
-                self.setWindowState((self.windowState() & ~Qt.WindowMinimized) | Qt.WindowActive)
-                self.activateWindow()
-                self.raise_()
-                
-                # 显示确认对话框
-                dialog = ConfirmDialog(self, task.reminder_text)
-                dialog.setWindowFlags(dialog.windowFlags() | Qt.WindowStaysOnTopHint)  # 设置对话框置顶
-                if dialog.exec() == QDialog.Accepted:
-                    pygame.mixer.music.stop()
-                    QApplication.alert(self, 0)  # 停止闪烁
-            except Exception as e:
-                QMessageBox.critical(self, "错误", f"播放音频文件时出错：{str(e)}")
+        # 加入提醒队列，对话框为非模态，不阻塞调度
+        self.alarms.enqueue(task, deadline)
+    
+    def _on_alarm_shown(self, task):
+        """提醒显示时播放音频并提醒用户"""
+        # 在任务自己的通道上循环播放，只发送命令，读取和解码都在音频线程中
+        if self.audio_error is not None:
+            QApplication.beep()
+        elif task.audio_file:
+            self.audio.play(task.id, task.audio_file)
+        
+        # 让任务栏图标闪烁提醒用户
+        QApplication.alert(self, 0)  # 0表示一直闪烁直到用户激活窗口
+        
+        # 将窗口置于前台并激活
+        self.setWindowState((self.windowState() & ~Qt.WindowMinimized) | Qt.WindowActive)
+        self.activateWindow()
+        self.raise_()
     
+    def _stop_alarm_sound(self, task_id):
+        """淡出某个提醒自己的声音，淡出结束、通道空出后恢复被抢占的提醒声音"""
+        self.audio.fade(task_id, self.ALARM_FADE_MS)
+        if self._muted_alarms:
+            QTimer.singleShot(self.ALARM_FADE_MS + 50, self._replay_muted_alarm)
+    
+    def _on_alarms_dismissed(self):
+        """所有提醒都已确认，停止播放"""
+        self._muted_alarms.clear()
+        self.audio.stop_all()
+        QApplication.alert(self, 0)  # 停止闪烁
+    
+    @instrumented("refresh_audio_files")
     def _refresh_audio_files(self):
-        """刷新音频文件列表"""
-        # 清空映射
-        self.audio_files = {}
-        
-        # 获取所有音频文件
-        audio_files = []
-        for ext in ["*.mp3", "*.wav", "*.ogg"]:
-            pattern = os.path.join(self.audio_dir, ext)
-            found = glob.glob(pattern)
-            audio_files.extend(found)
-        
-        # 获取相对路径作为显示名称
-        audio_names = [os.path.basename(f) for f in audio_files]
-        self.audio_files = dict(zip(audio_names, audio_files))
-        
-        if not audio_files:
+        """刷新音频文件列表，只重新检查有变化的文件"""
+        added, removed, changed = self.audio_index.refresh()
+        self.audio_files = self.audio_index.files()
+        
+        # 修改过的文件需要重新解码
+        for name in changed:
+            self.audio.discard(self.audio_files[name])
+        
+        if self.audio_index.dirty:
+            self._save_audio_index()
+        
+        # 通知打开的编辑对话框，重命名表现为一次删除加一次新增
+        if added or removed:
+            self.audio_files_changed.emit({name: self.audio_files[name] for name in added}, removed)
+        
+        # 提前标记音频文件已不存在的任务
+        self._check_task_audio()
+        
+        if not self.audio_files:
             print(f"未找到音频文件 - 请将音频放在: {self.audio_dir}")
-        else:
-            print(f"找到 {len(audio_files)} 个音频文件在 {self.audio_dir}")
-            for i, file in enumerate(sorted(audio_files)[:10]):  # 仅显示前10个文件
-                print(f"  {i+1}. {os.path.basename(file)}")
-            if len(audio_files) > 10:
-                print(f"  ... 以及其他 {len(audio_files) - 10} 个文件")
+        elif added or removed or changed:
+            print(f"找到 {len(self.audio_files)} 个音频文件在 {self.audio_dir}"
+                  f"（新增 {len(added)}，删除 {len(removed)}，修改 {len(changed)}）")
+    
+    def _check_task_audio(self):
+        """找出提醒音频已不在音频库中的任务"""
+        missing = set()
+        for task in self.tasks:
+            if task.audio_file and self.audio_index.get(task.audio_file) is None:
+                missing.add(task.audio_file)
+                if task.running:
+                    print(f"运行中任务的提醒音频不存在：{task.audio_file}")
+        self.task_model.set_missing_audio(missing)
+    
+    def _save_audio_index(self):
+        """保存音频库索引"""
+        try:
+            self.audio_index.save()
+        except OSError as e:
+            print(f"保存音频索引时出错：{str(e)}")
+    
+    def diagnostics_extra(self):
+        """诊断数据中除直方图之外的运行状态"""
+        return {
+            'tasks': len(self.tasks),
+            'running_tasks': len(self.engine.running_tasks),
+            'active_alarms': self.alarms.active_count(),
+            'wakeups': {
+                'per_minute': self.wakeups.per_minute(),
+                'total': self.wakeups.total,
+            },
+            'startup_ms': dict(self.startup.phases),
+        }
+    
+    def _show_diagnostics(self):
+        """显示诊断面板"""
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+        self.diagnostics_dialog.activateWindow()
     
     def closeEvent(self, event):
         """窗口关闭事件，保存配置"""
-        self._save_config()
-        if self.timer.isActive():
-            self.timer.stop()
+        # 先关闭控制接口，保存之后不再接受命令
+        if self.control is not None:
+            self.control.close()
+        
+        # 同步写入最终快照，同时压缩变更日志；未加载的任务先加载完，避免丢失
+        self.save_timer.stop()
+        self._save_deferred = False
+        try:
+            self._ensure_tasks_loaded()
+            self.store.compact(self._config_snapshot())
+        except Exception as e:
+            QMessageBox.warning(self, "配置保存错误", f"保存配置时出错：{str(e)}")
+        self.store.close()
+        
+        # 保存解码时补充的音频时长
+        if self.audio_index.dirty:
+            self._save_audio_index()
+        
+        self.display_clock.stop()
+        print(f"定时器唤醒：最近一分钟 {self.wakeups.per_minute()} 次，共 {self.wakeups.total} 次")
         
-        # 停止所有正在播放的音频
-        pygame.mixer.stop()
+        # 设置环境变量 COUNTDOWN_TIMER_DIAGNOSTICS=文件名 时退出时导出诊断数据
+        diagnostics_file = os.environ.get("COUNTDOWN_TIMER_DIAGNOSTICS")
+        if diagnostics_file:
+            try:
+                self.diagnostics.dump(diagnostics_file, self.diagnostics_extra())
+            except OSError as e:
+                print(f"导出诊断数据时出错：{str(e)}")
+        
+        # 停止所有正在播放的音频并结束音频线程
+        self.audio.close()
         
         # 关闭窗口
         event.accept()
 
-class Task:
-    """任务类，表示一个倒计时任务"""
-    def __init__(self, name="", hours=0, minutes=0, seconds=0, reminder_text="", audio_file="", enabled=True):
-        self.id = str(QUuid.createUuid())
-        self.name = name
-        self.hours = hours
-        self.minutes = minutes
-        self.seconds = seconds
-        self.reminder_text = reminder_text
-        self.audio_file = audio_file
-        self.enabled = enabled
-        self.remaining_seconds = 0
-        self.running = False
-        self.timer = None
-    
-    @property
-    def total_seconds(self):
-        """计算任务总秒数"""
-        return self.hours * 3600 + self.minutes * 60 + self.seconds
-    
-    def to_dict(self):
-        """将任务转换为字典，用于保存配置"""
-        return {
-            "id": self.id,
-            "name": self.name,
-            "hours": self.hours,
-            "minutes": self.minutes,
-            "seconds": self.seconds,
-            "reminder_text": self.reminder_text,
-            "audio_file": self.audio_file,
-            "enabled": self.enabled
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        """从字典创建任务，用于加载配置"""
-        task = cls(
-            name=data.get("name", ""),
-            hours=data.get("hours", 0),
-            minutes=data.get("minutes", 0),
-            seconds=data.get("seconds", 0),
-            reminder_text=data.get("reminder_text", ""),
-            audio_file=data.get("audio_file", ""),
-            enabled=data.get("enabled", True)
-        )
-        task.id = data.get("id", str(QUuid.createUuid()))
-        return task
+class DiagnosticsDialog(QDialog):
+    """诊断面板：关键路径的耗时分布、定时器抖动和提醒延迟"""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.setWindowTitle("诊断")
+        self.setModal(False)
+        self.resize(640, 400)
+
+        layout = QVBoxLayout(self)
+        self.text = QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        layout.addWidget(self.text)
+
+        buttons = QHBoxLayout()
+        export_button = QPushButton("导出JSON")
+        export_button.clicked.connect(self._export)
+        reset_button = QPushButton("重置")
+        reset_button.clicked.connect(self._reset)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.close)
+        buttons.addWidget(export_button)
+        buttons.addWidget(reset_button)
+        buttons.addStretch()
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        # 只在面板显示期间刷新
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start(self.REFRESH_MS)
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        diagnostics = self.window.diagnostics
+        extra = self.window.diagnostics_extra()
+
+        def fmt(value):
+            return "-" if value is None else f"{value:.2f}"
+
+        lines = [
+            f"任务 {extra['tasks']}，运行中 {extra['running_tasks']}，提醒 {extra['active_alarms']}，"
+            f"唤醒 {extra['wakeups']['per_minute']} 次/分钟（共 {extra['wakeups']['total']} 次）",
+            "",
+            f"{'名称':<22}{'次数':>6}{'平均ms':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'最大ms':>8}",  # 中文占两列
+        ]
+        for name, histogram in sorted(diagnostics.histograms.items()):
+            lines.append(
+                f"{name:<24}{histogram.count:>8}{fmt(histogram.mean_ms):>10}"
+                f"{fmt(histogram.percentile(50)):>10}{fmt(histogram.percentile(95)):>10}"
+                f"{fmt(histogram.percentile(99)):>10}{fmt(histogram.max_ms):>10}")
+        self.text.setPlainText("\n".join(lines))
+
+    def _export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出诊断数据", "diagnostics.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.window.diagnostics.dump(path, self.window.diagnostics_extra())
+        except OSError as e:
+            QMessageBox.warning(self, "导出错误", f"写入文件时出错：{str(e)}")
+
+    def _reset(self):
+        self.window.diagnostics.reset()
+        self.refresh()
 
 class TaskEditDialog(QDialog):
     """任务编辑对话框"""
@@ -946,6 +1926,24 @@ class TaskEditDialog(QDialog):
         self.setMinimumWidth(400)
         self.setFixedHeight(290)
         
+    def update_audio_files(self, added, removed):
+        """音频库变化时增量更新下拉框，保留当前选择"""
+        current = self.audio_combo.currentText()
+        
+        for name in removed:
+            self.audio_name_to_path.pop(name, None)
+            index = self.audio_combo.findText(name)
+            if index >= 0:
+                self.audio_combo.removeItem(index)
+        
+        for name, path in added.items():
+            if name not in self.audio_name_to_path:
+                self.audio_name_to_path[name] = path
+                self.audio_combo.addItem(name)
+        
+        if current in self.audio_name_to_path:
+            self.audio_combo.setCurrentText(current)
+    
     def accept(self):
         """确认编辑结果"""
         # 验证输入
@@ -977,235 +1975,340 @@ class TaskEditDialog(QDialog):
         
         super().accept()
 
-class TaskListItem(QWidget):
-    """自定义任务列表项，显示任务信息和控制按钮"""
-    def __init__(self, task, parent=None):
+class TaskListModel(QAbstractListModel):
+    """任务列表模型，视图只为可见行请求数据"""
+    TaskRole = Qt.UserRole + 1
+    AudioMissingRole = Qt.UserRole + 2
+
+    def __init__(self, engine, parent=None):
         super().__init__(parent)
-        self.task = task
-        self.setup_ui()
-    
-    def setup_ui(self):
-        """设置UI布局"""
-        # 使用简单的水平布局，确保按钮可见
-        main_layout = QHBoxLayout(self)
-        main_layout.setContentsMargins(10, 10, 10, 10)
-        main_layout.setSpacing(8)
-        
-        # 设置背景样式
-        self.setStyleSheet("""
-            background-color: #2D2D30;
-            border-radius: 6px;
-            border-left: 3px solid #007ACC;
-        """)
-        
-        # 左侧部分：状态指示器和任务信息
-        left_widget = QWidget()
-        left_widget.setStyleSheet("background-color: transparent; border: none;")
-        left_layout = QHBoxLayout(left_widget)
-        left_layout.setContentsMargins(0, 0, 0, 0)
-        left_layout.setSpacing(10)
-        
-        # 状态指示器
-        self.status_indicator = QLabel()
-        self.status_indicator.setFixedSize(12, 12)
-        self.update_status_indicator()
-        left_layout.addWidget(self.status_indicator)
-        
-        # 任务信息
-        info_widget = QWidget()
-        info_widget.setStyleSheet("background-color: transparent; border: none;")
-        info_layout = QVBoxLayout(info_widget)
-        info_layout.setContentsMargins(0, 0, 0, 0)
-        info_layout.setSpacing(3)
-        
-        # 提醒文字显示在上方
-        reminder = self.task.reminder_text
-        self.name_label = QLabel(reminder)
-        self.name_label.setStyleSheet("font-weight: bold; font-size: 14px; color: #FFFFFF;")
-        
-        # 时间信息显示在下方
-        time_str = f"{self.task.hours:02d}:{self.task.minutes:02d}:{self.task.seconds:02d}"
-        details_text = f"时间: {time_str}"
-        self.details_label = QLabel(details_text)
-        self.details_label.setStyleSheet("color: #B2B2B2; font-size: 12px;")
-        
-        info_layout.addWidget(self.name_label)
-        info_layout.addWidget(self.details_label)
-        left_layout.addWidget(info_widget)
-        
-        # 添加左侧部分，并设置为可伸展
-        main_layout.addWidget(left_widget, 1)
-        
-        # 占位空间，让按钮靠右
-        main_layout.addStretch()
-        
-        # 剩余时间显示
-        remain_widget = QWidget()
-        remain_widget.setStyleSheet("background-color: transparent; border: none;")
-        remain_layout = QVBoxLayout(remain_widget)
-        remain_layout.setContentsMargins(0, 0, 0, 0)
-        remain_layout.setAlignment(Qt.AlignCenter)
-        
-        remain_label = QLabel("剩余时间")
-        remain_label.setAlignment(Qt.AlignCenter)
-        remain_label.setStyleSheet("color: #888888; font-size: 11px;")
-        
-        self.remain_label = QLabel()
-        self.remain_label.setFixedWidth(80)
-        self.remain_label.setAlignment(Qt.AlignCenter)
-        self.update_remain_time()
-        
-        remain_layout.addWidget(remain_label)
-        remain_layout.addWidget(self.remain_label)
-        main_layout.addWidget(remain_widget)
-        
-        # 按钮容器 - 固定宽度确保一直可见
-        buttons_widget = QWidget()
-        buttons_widget.setFixedWidth(110)
-        buttons_widget.setStyleSheet("background-color: transparent; border: none;")
-        buttons_layout = QHBoxLayout(buttons_widget)
-        buttons_layout.setContentsMargins(0, 0, 0, 0)
-        buttons_layout.setSpacing(5)
-        
-        # 开始/停止按钮
-        self.toggle_button = QPushButton("开始" if not self.task.running else "停止")
-        self.toggle_button.setFixedSize(50, 30)
-        self.toggle_button.setCursor(Qt.PointingHandCursor)
-        self.update_toggle_button()
-        
-        # 删除按钮
-        self.delete_button = QPushButton("删除")
-        self.delete_button.setFixedSize(45, 30)
-        self.delete_button.setCursor(Qt.PointingHandCursor)
-        self.delete_button.setStyleSheet("""
-            QPushButton {
-                background-color: #E74C3C;
-                color: white;
-                border-radius: 4px;
-                font-size: 12px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #FF6B5E;
-            }
-        """)
-        
-        buttons_layout.addWidget(self.toggle_button)
-        buttons_layout.addWidget(self.delete_button)
-        
-        # 添加按钮区域到主布局
-        main_layout.addWidget(buttons_widget)
-        
-        # 设置固定高度
-        self.setFixedHeight(70)
-    
-    def update_status_indicator(self):
-        """更新状态指示器"""
-        color = "#555555"  # 默认灰色（禁用）
-        
-        if self.task.enabled:
-            if self.task.running:
-                color = "#00C853"  # 运行中为绿色
-            else:
-                color = "#007ACC"  # 启用但未运行为蓝色
-        
-        self.status_indicator.setStyleSheet(f"""
-            background-color: {color};
-            border-radius: 5px;
-        """)
+        self.engine = engine
+        self.tasks = engine.tasks  # TaskRegistry
+        self.missing_audio = set()  # 已不存在的提醒音频路径
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self.tasks):
+            return None
+
+        task = self.tasks[index.row()]
+        if role == self.TaskRole:
+            return task
+        if role == self.AudioMissingRole:
+            return bool(task.audio_file) and task.audio_file in self.missing_audio
+        if role == Qt.DisplayRole:
+            return task.reminder_text
+        return None
+
+    def index_of(self, task):
+        """返回任务对应的模型索引"""
+        row = self.tasks.row_of(task)
+        return QModelIndex() if row is None else self.index(row)
+
+    def set_tasks(self, tasks):
+        """替换全部任务"""
+        self.beginResetModel()
+        self.tasks.reset(tasks)
+        self.endResetModel()
+
+    def add_task(self, task):
+        """在末尾添加任务"""
+        row = len(self.tasks)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.engine.add_task(task)
+        self.endInsertRows()
+
+    def add_tasks(self, tasks):
+        """在末尾批量添加任务，只发出一次插入通知"""
+        if not tasks:
+            return
+        row = len(self.tasks)
+        self.beginInsertRows(QModelIndex(), row, row + len(tasks) - 1)
+        for task in tasks:
+            self.engine.add_task(task)
+        self.endInsertRows()
+
+    def remove_task(self, task):
+        """移除任务"""
+        row = self.tasks.row_of(task)
+        if row is None:
+            return
+        # 先停止任务，避免在删除行的过程中发出数据变化通知
+        if task.running:
+            self.engine.stop(task)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.engine.remove_task(task)
+        self.endRemoveRows()
+
+    def task_changed(self, task):
+        """通知视图重绘某个任务"""
+        index = self.index_of(task)
+        if index.isValid():
+            self.dataChanged.emit(index, index)
+
+    def set_missing_audio(self, paths):
+        """更新缺失的音频路径"""
+        if paths != self.missing_audio:
+            self.missing_audio = paths
+            self.refresh_all()
     
-    def update_remain_time(self):
-        """更新剩余时间显示"""
-        if self.task.running:
-            hours, remainder = divmod(self.task.remaining_seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            time_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-            self.remain_label.setText(time_str)
-            
-            # 根据剩余时间调整颜色
-            if self.task.remaining_seconds < 10:
-                self.remain_label.setStyleSheet("font-size: 14px; color: #FF5252; font-weight: bold;")
-            elif self.task.remaining_seconds < 30:
-                self.remain_label.setStyleSheet("font-size: 14px; color: #FFA000; font-weight: bold;")
-            else:
-                self.remain_label.setStyleSheet("font-size: 14px; color: #00C853; font-weight: bold;")
+    def refresh_rows(self, first, last):
+        """通知视图重绘指定范围内的任务"""
+        last = min(last, len(self.tasks) - 1)
+        if 0 <= first <= last:
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+    def refresh_all(self):
+        """通知视图重绘全部任务，视图只会重绘可见部分"""
+        if len(self.tasks):
+            self.dataChanged.emit(self.index(0), self.index(len(self.tasks) - 1))
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """任务列表项绘制代理，直接绘制状态指示器、提醒文字、剩余时间和控制按钮"""
+    toggle_clicked = Signal(object)
+    delete_clicked = Signal(object)
+
+    ITEM_HEIGHT = 70
+    BUTTONS_WIDTH = 110
+    REMAIN_WIDTH = 80
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self._hover = None  # (行号, 按钮名)
+
+        self.name_font = QFont()
+        self.name_font.setPixelSize(14)
+        self.name_font.setBold(True)
+        self.details_font = QFont()
+        self.details_font.setPixelSize(12)
+        self.caption_font = QFont()
+        self.caption_font.setPixelSize(11)
+        self.remain_font = QFont()
+        self.remain_font.setPixelSize(14)
+        self.remain_font.setBold(True)
+        self.button_font = QFont()
+        self.button_font.setPixelSize(12)
+        self.button_font.setBold(True)
+
+        # 预先创建绘制用的颜色，每次绘制不再解析颜色字符串
+        self.background_color = QColor("#2D2D30")
+        self.accent_color = QColor("#007ACC")
+        self.status_colors = {
+            "disabled": QColor("#555555"),
+            "running": QColor("#00C853"),
+            "idle": QColor("#007ACC"),
+        }
+        self.name_colors = {True: QColor("#FFFFFF"), False: QColor("#888888")}
+        self.details_colors = {True: QColor("#AAAAAA"), False: QColor("#666666")}
+        self.caption_color = QColor("#888888")
+        self.warning_color = QColor("#FFA000")
+        self.remain_colors = tuple(QColor(color) for color in REMAIN_BAND_COLORS)
+        # 按钮样式：(背景色, 悬停背景色, 文字颜色)
+        self.button_styles = {
+            "disabled": (QColor("#555555"), QColor("#555555"), QColor("#999999")),
+            "start": (QColor("#00C853"), QColor("#00E676"), QColor("white")),
+            "stop": (QColor("#FF5252"), QColor("#FF7373"), QColor("white")),
+            "delete": (QColor("#E74C3C"), QColor("#FF6B5E"), QColor("white")),
+        }
+
+        # 鼠标离开列表时清除按钮悬停状态
+        view.viewport().installEventFilter(self)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ITEM_HEIGHT)
+
+    def _layout(self, rect):
+        """计算状态指示器、文字、剩余时间和按钮的区域"""
+        inner = rect.adjusted(10, 10, -10, -10)
+        mid = inner.center().y()
+        buttons_left = inner.right() - self.BUTTONS_WIDTH + 1
+
+        toggle = QRect(buttons_left, mid - 15, 50, 30)
+        delete = QRect(toggle.right() + 6, mid - 15, 45, 30)
+        remain = QRect(buttons_left - 8 - self.REMAIN_WIDTH, inner.top(), self.REMAIN_WIDTH, inner.height())
+        dot = QRect(inner.left(), mid - 6, 12, 12)
+        text = QRect(dot.right() + 11, inner.top(), max(0, remain.left() - 8 - dot.right() - 11), inner.height())
+        return dot, text, remain, toggle, delete
+
+    @staticmethod
+    def _toggle_enabled(task):
+        return task.enabled
+
+    @staticmethod
+    def _delete_enabled(task):
+        # 禁用的任务在运行时不允许删除
+        return task.enabled or not task.running
+
+    def button_at(self, rect, pos, task):
+        """返回位置所在的可用按钮名，不在按钮上时返回None"""
+        _, _, _, toggle_rect, delete_rect = self._layout(rect)
+        if toggle_rect.contains(pos) and self._toggle_enabled(task):
+            return "toggle"
+        if delete_rect.contains(pos) and self._delete_enabled(task):
+            return "delete"
+        return None
+
+    def paint(self, painter, option, index):
+        task = index.data(TaskListModel.TaskRole)
+        if task is None:
+            return
+
+        rect = option.rect
+        dot, text_rect, remain_rect, toggle_rect, delete_rect = self._layout(rect)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # 背景和左侧色条
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(rect), 6, 6)
+        painter.fillPath(path, self.background_color)
+        painter.save()
+        painter.setClipPath(path)
+        painter.fillRect(QRect(rect.left(), rect.top(), 3, rect.height()), self.accent_color)
+        painter.restore()
+
+        # 状态指示器：禁用为灰色，运行中为绿色，启用但未运行为蓝色
+        if not task.enabled:
+            status = "disabled"
+        elif task.running:
+            status = "running"
         else:
-            self.remain_label.setText("")
-    
-    def update_toggle_button(self):
-        """更新开始/停止按钮状态"""
-        if not self.task.enabled:
-            # 任务禁用状态
-            self.toggle_button.setText("开始")
-            self.toggle_button.setEnabled(False)
-            self.toggle_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #555555;
-                    color: #999999;
-                    border-radius: 4px;
-                    font-size: 12px;
-                    font-weight: bold;
-                }
-            """)
-        elif self.task.running:
-            # 任务运行状态
-            self.toggle_button.setText("停止")
-            self.toggle_button.setEnabled(True)
-            self.toggle_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #FF5252;
-                    color: white;
-                    border-radius: 4px;
-                    font-size: 12px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #FF7373;
-                }
-            """)
+            status = "idle"
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.status_colors[status])
+        painter.drawRoundedRect(dot, 5, 5)
+
+        # 提醒文字显示在上方，时间信息显示在下方
+        half = text_rect.height() // 2
+        name_rect = QRect(text_rect.left(), text_rect.top(), text_rect.width(), half - 1)
+        details_rect = QRect(text_rect.left(), text_rect.top() + half + 2, text_rect.width(), half - 2)
+
+        enabled = bool(task.enabled)
+
+        painter.setFont(self.name_font)
+        painter.setPen(self.name_colors[enabled])
+        name = QFontMetrics(self.name_font).elidedText(task.reminder_text, Qt.ElideRight, name_rect.width())
+        painter.drawText(name_rect, Qt.AlignLeft | Qt.AlignBottom, name)
+
+        painter.setFont(self.details_font)
+        painter.setPen(self.details_colors[enabled])
+        time_str = f"{task.hours:02d}:{task.minutes:02d}:{task.seconds:02d}"
+        details = f"时间: {time_str}"
+        painter.drawText(details_rect, Qt.AlignLeft | Qt.AlignTop, details)
+
+        # 提醒音频已不存在时在时间信息后显示警告
+        if index.data(TaskListModel.AudioMissingRole):
+            offset = QFontMetrics(self.details_font).horizontalAdvance(details + "  ")
+            painter.setPen(self.warning_color)
+            painter.drawText(details_rect.adjusted(offset, 0, 0, 0), Qt.AlignLeft | Qt.AlignTop, "⚠ 音频文件不存在")
+
+        # 剩余时间
+        half = remain_rect.height() // 2
+        caption_rect = QRect(remain_rect.left(), remain_rect.top(), remain_rect.width(), half)
+        value_rect = QRect(remain_rect.left(), remain_rect.top() + half, remain_rect.width(), half)
+
+        painter.setFont(self.caption_font)
+        painter.setPen(self.caption_color)
+        painter.drawText(caption_rect, Qt.AlignHCenter | Qt.AlignBottom, "剩余时间")
+
+        if task.running:
+            # 根据剩余时间所在分段选择预先创建的颜色
+            remaining = task.remaining_seconds
+            painter.setFont(self.remain_font)
+            painter.setPen(self.remain_colors[remain_band(remaining)])
+            painter.drawText(value_rect, Qt.AlignHCenter | Qt.AlignTop, format_seconds(remaining))
+
+        # 开始/停止按钮
+        row = index.row()
+        if not task.enabled:
+            self._draw_button(painter, toggle_rect, "开始", "disabled", False)
+        elif task.running:
+            self._draw_button(painter, toggle_rect, "停止", "stop", self._hover == (row, "toggle"))
         else:
-            # 任务启用但未运行状态
-            self.toggle_button.setText("开始")
-            self.toggle_button.setEnabled(True)
-            self.toggle_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #00C853;
-                    color: white;
-                    border-radius: 4px;
-                    font-size: 12px;
-                    font-weight: bold;
-                }
-                QPushButton:hover {
-                    background-color: #00E676;
-                }
-            """)
-    
-    def update_all(self):
-        """更新所有显示内容"""
-        self.update_status_indicator()
-        self.update_remain_time()
-        self.update_toggle_button()
-        
-        # 更新提醒文字和时间信息
-        time_str = f"{self.task.hours:02d}:{self.task.minutes:02d}:{self.task.seconds:02d}"
-        self.name_label.setText(self.task.reminder_text)
-        self.details_label.setText(f"时间: {time_str}")
-        
-        # 如果任务被禁用，更新文字颜色
-        if not self.task.enabled:
-            self.name_label.setStyleSheet("font-weight: bold; font-size: 14px; color: #888888;")
-            self.details_label.setStyleSheet("color: #666666; font-size: 12px;")
-            # 禁用删除按钮
-            self.delete_button.setEnabled(self.task.running == False)
+            self._draw_button(painter, toggle_rect, "开始", "start", self._hover == (row, "toggle"))
+
+        # 删除按钮
+        if self._delete_enabled(task):
+            self._draw_button(painter, delete_rect, "删除", "delete", self._hover == (row, "delete"))
         else:
-            self.name_label.setStyleSheet("font-weight: bold; font-size: 14px;")
-            self.details_label.setStyleSheet("color: #AAAAAA; font-size: 12px;")
-            # 启用删除按钮
-            self.delete_button.setEnabled(True)
+            self._draw_button(painter, delete_rect, "删除", "disabled", False)
+
+        painter.restore()
+
+    def _draw_button(self, painter, rect, text, style, hovered):
+        """绘制圆角按钮"""
+        color, hover_color, text_color = self.button_styles[style]
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(hover_color if hovered else color)
+        painter.drawRoundedRect(rect, 4, 4)
+        painter.setFont(self.button_font)
+        painter.setPen(text_color)
+        painter.drawText(rect, Qt.AlignCenter, text)
+
+    def _set_hover(self, hover):
+        """更新悬停按钮并刷新视图"""
+        if hover != self._hover:
+            self._hover = hover
+            self.view.viewport().setCursor(Qt.PointingHandCursor if hover else Qt.ArrowCursor)
+            self.view.viewport().update()
+
+    def editorEvent(self, event, model, option, index):
+        """处理列表项上按钮的悬停和点击"""
+        if event.type() not in (QEvent.MouseMove, QEvent.MouseButtonPress,
+                                QEvent.MouseButtonRelease, QEvent.MouseButtonDblClick):
+            return False
+
+        task = index.data(TaskListModel.TaskRole)
+        if task is None:
+            return False
+
+        button = self.button_at(option.rect, event.position().toPoint(), task)
+        self._set_hover((index.row(), button) if button else None)
+
+        if button is None:
+            return False
+
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if button == "toggle":
+                self.toggle_clicked.emit(task)
+            else:
+                self.delete_clicked.emit(task)
+
+        # 按钮上的按下、双击等事件不再传递给列表
+        return True
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Leave:
+            self._set_hover(None)
+        return super().eventFilter(obj, event)
 
 def main():
+    startup = StartupTimer(STARTUP_BEGIN)
+    startup.mark("导入", IMPORTS_DONE)
+    profiling = start_profiler()
+    
     # 创建QApplication实例
     app = QApplication(sys.argv)
+    argv = app.arguments()[1:]
+    
+    # 在创建界面和读取配置之前占用控制接口的名称：另一个实例恰好在
+    # 启动检查之后开始监听时，把命令行转发给它并退出，避免两个实例同时写配置
+    control = None
+    if os.environ.get("COUNTDOWN_TIMER_CONTROL") != "0":
+        control = ControlServer()
+        if not control.listen():
+            if control.other_instance:
+                code = forward_command_line(argv)
+                if code is not None:
+                    sys.exit(code)
+            # 另一个实例刚好已经退出时再试一次
+            if not control.listen():
+                control = None
+    
     app.setStyle(QStyleFactory.create("Fusion"))
     
     # 设置应用图标
@@ -1214,11 +2317,23 @@ def main():
         app.setWindowIcon(QIcon(icon_path))
     
     # 创建并显示主窗口
-    window = CountdownTimer()
+    window = CountdownTimer(startup, control)
+    
+    # 首次绘制完成后再填充任务列表和初始化音频，
+    # 没有其他实例时，命令行参数（如 add 25m）也在此时由本实例执行
+    
+    def first_frame():
+        window.on_first_frame()
+        if argv:
+            window.run_command_line(argv)
+    
+    FirstPaintFilter(window, first_frame)
     window.show()
     
     # 运行应用程序
-    sys.exit(app.exec())
+    code = app.exec()
+    stop_profiler(profiling)
+    sys.exit(code)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
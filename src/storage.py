@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""配置持久化
+
+配置快照由后台线程序列化并原子写入（临时文件 + 重命名），
+连续的多次保存只写入最新的一份。可选的追加式变更日志只记录单个任务的改动，
+加载时在快照之上重放，退出时压缩回快照。
+
+任务单独保存在 JSON Lines 文件中（TaskFile），每行一个任务，
+配合按ID排序的二进制索引可以按ID随机读取，加载时可以分块逐步读取。
+settings.json 只保存窗口、音频等少量设置。
+
+TaskStore 是存储接口，ConfigStore 使用上述文件，SQLiteStore 使用SQLite数据库，
+每次改动只写入变化的那一行，并支持按截止时间查询。
+"""
+
+import os
+import json
+import struct
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from collections import deque
+
+
+def _atomic_write(path, write, mode='w', suffix=".tmp"):
+    """原子写入文件，write(f) 负责写入内容"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=suffix, dir=directory)
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, data):
+    """原子写入JSON文件：先写临时文件再替换，写入中途崩溃不会损坏原文件"""
+    _atomic_write(path, lambda f: json.dump(data, f, ensure_ascii=False), suffix=".json")
+
+
+class TaskFile:
+    """任务文件：JSON Lines 数据文件 + 二进制ID索引
+
+    索引文件由定长记录组成，每条为 (ID哈希8字节, 行偏移8字节)，按哈希排序，
+    按ID查找时在索引中二分查找，再跳到对应的行读取，不需要读入整个文件。
+    索引过期（例如写入中途崩溃）时 get() 会核对ID，找不到则回退为顺序扫描。
+    """
+
+    RECORD = struct.Struct(">8sQ")
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+
+    @staticmethod
+    def _key(task_id):
+        return hashlib.blake2b(task_id.encode('utf-8'), digest_size=8).digest()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def count(self):
+        """任务数量（来自索引）"""
+        try:
+            return os.path.getsize(self.index_path) // self.RECORD.size
+        except OSError:
+            return 0
+
+    def write(self, tasks):
+        """原子写入全部任务并重建索引"""
+        index = []
+
+        def write_data(f):
+            offset = 0
+            for task_data in tasks:
+                line = (json.dumps(task_data, ensure_ascii=False) + "\n").encode('utf-8')
+                index.append((self._key(task_data.get('id') or ""), offset))
+                f.write(line)
+                offset += len(line)
+
+        def write_index(f):
+            index.sort()
+            for key, offset in index:
+                f.write(self.RECORD.pack(key, offset))
+
+        _atomic_write(self.path, write_data, 'wb', ".jsonl")
+        _atomic_write(self.index_path, write_index, 'wb', ".idx")
+
+    def iter_records(self):
+        """按顺序逐条读取任务字典，跳过损坏的行"""
+        if not self.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def get(self, task_id):
+        """按ID读取任务字典，不存在时返回None"""
+        if not self.exists():
+            return None
+        key = self._key(task_id)
+        try:
+            with open(self.index_path, 'rb') as index, open(self.path, 'rb') as data:
+                count = os.fstat(index.fileno()).st_size // self.RECORD.size
+
+                # 二分查找第一个哈希不小于key的记录
+                lo, hi = 0, count
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    index.seek(mid * self.RECORD.size)
+                    if self.RECORD.unpack(index.read(self.RECORD.size))[0] < key:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+
+                # 哈希相同的记录依次核对ID
+                index.seek(lo * self.RECORD.size)
+                for _ in range(lo, count):
+                    record_key, offset = self.RECORD.unpack(index.read(self.RECORD.size))
+                    if record_key != key:
+                        break
+                    data.seek(offset)
+                    try:
+                        task_data = json.loads(data.readline())
+                    except ValueError:
+                        continue
+                    if task_data.get('id') == task_id:
+                        return task_data
+        except OSError:
+            pass
+
+        # 索引缺失或过期
+        for task_data in self.iter_records():
+            if task_data.get('id') == task_id:
+                return task_data
+        return None
+
+
+class TaskStore:
+    """存储接口，所有写入都在后台线程中按顺序执行
+
+    子类实现读取（load_settings、iter_tasks、get_task）
+    以及写入（_write_snapshot、_write_change）。
+    """
+
+    incremental = False  # 是否支持单个任务的增量写入（append）
+
+    def __init__(self, on_error=None):
+        self.on_error = on_error  # 写入失败时在后台线程中回调，参数为异常
+
+        self._ops = deque()  # ('snapshot', 配置) 或 ('change', 变更)
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """读取完整配置（包括全部任务），配置不存在时返回None"""
+        config = self.load_settings()
+        if config is None:
+            return None
+        config['tasks'] = [task for chunk in self.iter_tasks(config) for task in chunk]
+        return config
+
+    def load_settings(self):
+        """只读取窗口、音频等设置，任务通过 iter_tasks() 分块读取，配置不存在时返回None"""
+        raise NotImplementedError
+
+    def iter_tasks(self, config, chunk_size=1000, first_chunk_size=None):
+        """分块读取任务字典，每次生成一个列表
+
+        first_chunk_size 指定第一块的大小，用于先读取第一屏任务。
+        """
+        raise NotImplementedError
+
+    def get_task(self, task_id):
+        """按ID读取已保存的单个任务，不存在时返回None"""
+        raise NotImplementedError
+
+    def save(self, config):
+        """异步写入完整配置快照，尚未写入的旧快照会被丢弃"""
+        with self._cond:
+            if self._ops and self._ops[-1][0] == 'snapshot':
+                self._ops[-1] = ('snapshot', config)
+            else:
+                self._ops.append(('snapshot', config))
+            self._cond.notify_all()
+
+    def append(self, entry):
+        """异步写入单个任务的改动
+
+        entry 为 {'op': 'upsert', 'task': 任务字典} 或 {'op': 'delete', 'id': 任务ID}
+        """
+        with self._cond:
+            self._ops.append(('change', entry))
+            self._cond.notify_all()
+
+    def needs_compaction(self):
+        """是否需要写入完整快照"""
+        return False
+
+    def flush(self):
+        """等待所有排队的写入完成"""
+        with self._cond:
+            while self._ops or self._busy:
+                self._cond.wait()
+
+    def compact(self, config):
+        """同步写入完整快照，用于退出时"""
+        self.flush()
+        self._write_snapshot(config)
+
+    def close(self):
+        """写完剩余内容后停止后台线程"""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _write_snapshot(self, config):
+        raise NotImplementedError
+
+    def _write_change(self, entry):
+        raise NotImplementedError
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._ops and not self._closed:
+                    self._cond.wait()
+                if not self._ops:
+                    return
+                kind, payload = self._ops.popleft()
+                self._busy = True
+
+            try:
+                if kind == 'snapshot':
+                    self._write_snapshot(payload)
+                else:
+                    self._write_change(payload)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(e)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+class ConfigStore(TaskStore):
+    """基于JSON文件的配置存储
+
+    启用变更日志时，单个任务的改动追加到日志中，加载时在快照之上重放，
+    写入完整快照时清空日志。
+    """
+
+    JOURNAL_COMPACT_THRESHOLD = 1000  # 变更日志超过该条数时建议压缩
+
+    def __init__(self, config_file, use_journal=False, on_error=None):
+        self.config_file = config_file
+        self.journal_file = config_file + ".journal"
+        self.task_file = TaskFile(os.path.splitext(config_file)[0] + ".tasks.jsonl")
+        self.use_journal = use_journal
+        # 日志中已写入的条数，只在执行写入的线程中修改（后台线程，或flush之后的compact）
+        self.journal_entries = self._count_journal_entries()
+        super().__init__(on_error)
+
+    @property
+    def incremental(self):
+        return self.use_journal
+
+    def load_settings(self):
+        """读取设置，旧版本的配置中任务仍保存在 'tasks' 键下"""
+        config = None
+        if os.path.exists(self.config_file):
+            with open(self.config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+
+        has_journal = self.use_journal and os.path.exists(self.journal_file)
+        if config is None and (self.task_file.exists() or has_journal):
+            config = {}
+        return config
+
+    def iter_tasks(self, config, chunk_size=1000, first_chunk_size=None):
+        """分块读取任务字典，已重放变更日志
+
+        任务来自旧版配置的 'tasks' 键或任务文件，重复ID只保留第一个。
+        """
+        upserts, deleted = self._read_journal()
+        if 'tasks' in config:
+            records = iter(config.pop('tasks'))
+        else:
+            records = self.task_file.iter_records()
+
+        seen = set()
+        chunk = []
+        limit = first_chunk_size or chunk_size
+        for task_data in records:
+            task_id = task_data.get('id')
+            if task_id in seen or task_id in deleted:
+                continue
+            seen.add(task_id)
+            chunk.append(upserts.pop(task_id, task_data))
+            if len(chunk) >= limit:
+                yield chunk
+                chunk = []
+                limit = chunk_size
+
+        # 变更日志中新增的任务追加在末尾
+        chunk.extend(upserts.values())
+        if chunk:
+            yield chunk
+
+    def get_task(self, task_id):
+        """按ID读取已保存的单个任务（不包括变更日志中尚未压缩的改动）"""
+        return self.task_file.get(task_id)
+
+    def _count_journal_entries(self):
+        if not (self.use_journal and os.path.exists(self.journal_file)):
+            return 0
+        with open(self.journal_file, 'rb') as f:
+            return sum(1 for _line in f)
+
+    def _read_journal(self):
+        """读取变更日志，返回 (ID -> 最新任务字典, 已删除的ID)"""
+        upserts, deleted = {}, set()
+        if not (self.use_journal and os.path.exists(self.journal_file)):
+            return upserts, deleted
+
+        with open(self.journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 崩溃时可能留下写了一半的最后一行
+                    break
+                if entry.get('op') == 'upsert':
+                    task_id = entry['task'].get('id')
+                    deleted.discard(task_id)
+                    upserts[task_id] = entry['task']
+                elif entry.get('op') == 'delete':
+                    upserts.pop(entry.get('id'), None)
+                    deleted.add(entry.get('id'))
+        return upserts, deleted
+
+    def needs_compaction(self):
+        """变更日志是否已经过长（按已写入的条数，尚在队列中的不计）"""
+        return self.journal_entries >= self.JOURNAL_COMPACT_THRESHOLD
+
+    def _write_snapshot(self, config):
+        # 先写任务文件再写设置，中途崩溃时旧设置中的任务（若有）仍然完整
+        if 'tasks' in config:
+            self.task_file.write(config['tasks'])
+        atomic_write_json(self.config_file, {k: v for k, v in config.items() if k != 'tasks'})
+        if self.use_journal:
+            # 快照已包含之前的所有改动
+            with open(self.journal_file, 'w', encoding='utf-8'):
+                pass
+            self.journal_entries = 0
+
+    def _write_change(self, entry):
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.journal_entries += 1
+
+
+class SQLiteStore(TaskStore):
+    """基于SQLite的配置存储
+
+    每个任务一行，按ID、启用状态和截止时间建立索引，使用WAL模式，
+    单个任务的改动只写入一行。截止时间取任务字典中的 'deadline'
+    （运行中任务的墙上时钟截止时间），未运行的任务为NULL。
+    """
+
+    incremental = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS tasks (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            enabled INTEGER NOT NULL,
+            deadline REAL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS tasks_position ON tasks(position);
+        CREATE INDEX IF NOT EXISTS tasks_enabled ON tasks(enabled);
+        CREATE INDEX IF NOT EXISTS tasks_deadline ON tasks(deadline) WHERE deadline IS NOT NULL;
+    """
+
+    UPSERT = """
+        INSERT INTO tasks (id, position, enabled, deadline, data)
+        VALUES (?, COALESCE((SELECT MAX(position) FROM tasks), -1) + 1, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            enabled = excluded.enabled, deadline = excluded.deadline, data = excluded.data
+    """
+
+    def __init__(self, db_file, on_error=None):
+        self.db_file = db_file
+        # 写入连接由后台线程和退出时的compact()轮流使用，读取使用单独的连接
+        self._writer = self._connect()
+        self._writer.executescript(self.SCHEMA)
+        self._reader = self._connect()
+        super().__init__(on_error)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _row(task_data):
+        return (
+            1 if task_data.get('enabled', True) else 0,
+            task_data.get('deadline'),
+            json.dumps(task_data, ensure_ascii=False),
+        )
+
+    def is_empty(self):
+        """数据库中是否还没有保存过配置"""
+        return self._reader.execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM settings) AND NOT EXISTS (SELECT 1 FROM tasks)"
+        ).fetchone()[0] == 1
+
+    def load_settings(self):
+        if self.is_empty():
+            return None
+        rows = self._reader.execute("SELECT key, value FROM settings")
+        return {key: json.loads(value) for key, value in rows}
+
+    def iter_tasks(self, config, chunk_size=1000, first_chunk_size=None):
+        cursor = self._reader.execute("SELECT data FROM tasks ORDER BY position")
+        limit = first_chunk_size or chunk_size
+        while True:
+            rows = cursor.fetchmany(limit)
+            if not rows:
+                return
+            yield [json.loads(data) for data, in rows]
+            limit = chunk_size
+
+    def get_task(self, task_id):
+        row = self._reader.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def next_expiring(self, limit=20):
+        """按截止时间返回最先到期的运行中任务"""
+        rows = self._reader.execute(
+            "SELECT data FROM tasks WHERE deadline IS NOT NULL ORDER BY deadline LIMIT ?", (limit,))
+        return [json.loads(data) for data, in rows]
+
+    def count_enabled(self):
+        """已启用的任务数"""
+        return self._reader.execute("SELECT COUNT(*) FROM tasks WHERE enabled = 1").fetchone()[0]
+
+    def close(self):
+        super().close()
+        self._reader.close()
+        self._writer.close()
+
+    def _write_snapshot(self, config):
+        """写入完整快照：只更新内容有变化的行，删除快照中不存在的任务"""
+        with self._writer as conn:
+            conn.executemany(
+                "INSERT INTO settings (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in config.items() if key != 'tasks'])
+
+            if 'tasks' not in config:
+                return
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS snapshot_ids (id TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM snapshot_ids")
+            rows = []
+            for position, task_data in enumerate(config['tasks']):
+                rows.append((task_data.get('id'), position) + self._row(task_data))
+            conn.executemany("INSERT OR IGNORE INTO snapshot_ids (id) VALUES (?)", [(row[0],) for row in rows])
+            conn.executemany(
+                "INSERT INTO tasks (id, position, enabled, deadline, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET position = excluded.position, enabled = excluded.enabled, "
+                "deadline = excluded.deadline, data = excluded.data "
+                "WHERE position IS NOT excluded.position OR data IS NOT excluded.data",
+                rows)
+            conn.execute("DELETE FROM tasks WHERE id NOT IN (SELECT id FROM snapshot_ids)")
+
+    def _write_change(self, entry):
+        with self._writer as conn:
+            if entry.get('op') == 'upsert':
+                task_data = entry['task']
+                conn.execute(self.UPSERT, (task_data.get('id'),) + self._row(task_data))
+            elif entry.get('op') == 'delete':
+                conn.execute("DELETE FROM tasks WHERE id = ?", (entry.get('id'),))
+
+
+def open_store(config_dir, backend="json", use_journal=False, on_error=None):
+    """按后端名称创建配置存储
+
+    backend 为 'sqlite' 时使用 settings.db，第一次使用时从JSON配置迁移。
+    """
+    config_file = os.path.join(config_dir, "settings.json")
+    if backend != "sqlite":
+        return ConfigStore(config_file, use_journal=use_journal, on_error=on_error)
+
+    store = SQLiteStore(os.path.join(config_dir, "settings.db"), on_error=on_error)
+    if store.is_empty() and os.path.exists(config_file):
+        legacy = ConfigStore(config_file, use_journal=True)
+        try:
+            config = legacy.load()
+        finally:
+            legacy.close()
+        if config is not None:
+            store.compact(config)
+    return store
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""任务批量导入导出
+
+支持 JSON Lines（每行一个任务对象）和 CSV 两种格式，逐条读取和写入，
+不会一次性把整个文件读入内存。每条记录单独校验，出错的行会带行号报告，
+不影响其余记录的导入。
+"""
+
+import os
+import csv
+import json
+
+from engine import Task, MAX_HOURS
+
+CSV_FIELDS = ("id", "name", "hours", "minutes", "seconds", "reminder_text", "audio_file", "enabled")
+TRUE_VALUES = ("1", "true", "yes", "y", "是")
+FALSE_VALUES = ("0", "false", "no", "n", "否")
+
+
+def file_format(path):
+    """根据扩展名判断格式，返回 'csv' 或 'jsonl'"""
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "jsonl"
+
+
+def validate_task_data(data):
+    """校验并规范化一条任务记录，出错时抛出ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("记录不是对象")
+
+    result = {}
+    for key in ("id", "name", "reminder_text", "audio_file"):
+        value = data.get(key)
+        if value is None:
+            value = ""
+        if not isinstance(value, str):
+            raise ValueError(f"{key} 必须是字符串")
+        result[key] = value
+
+    for key, limit in (("hours", MAX_HOURS), ("minutes", 59), ("seconds", 59)):
+        value = data.get(key, 0)
+        if value in (None, ""):
+            value = 0
+        if isinstance(value, str):
+            value = value.strip()
+            if not value.isdigit():
+                raise ValueError(f"{key} 不是整数：{value}")
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise ValueError(f"{key} 不是整数：{value}")
+        if value < 0 or value > limit:
+            raise ValueError(f"{key} 超出范围：{value}")
+        result[key] = value
+
+    if result["hours"] * 3600 + result["minutes"] * 60 + result["seconds"] <= 0:
+        raise ValueError("倒计时时长必须大于0")
+
+    enabled = data.get("enabled", True)
+    if enabled in (None, ""):
+        enabled = True
+    if isinstance(enabled, str):
+        lowered = enabled.strip().lower()
+        if lowered in TRUE_VALUES:
+            enabled = True
+        elif lowered in FALSE_VALUES:
+            enabled = False
+    if not isinstance(enabled, bool):
+        raise ValueError(f"enabled 不是布尔值：{enabled}")
+    result["enabled"] = enabled
+
+    if not result["id"]:
+        del result["id"]
+    return result
+
+
+def _iter_jsonl_records(f):
+    for line_no, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line), None
+        except ValueError as e:
+            yield line_no, None, f"JSON格式错误：{e}"
+
+
+def _iter_csv_records(f):
+    reader = csv.DictReader(f)
+    try:
+        fieldnames = reader.fieldnames
+    except csv.Error as e:
+        yield 1, None, f"CSV格式错误：{e}"
+        return
+    if fieldnames is None:
+        return
+    missing = {"hours", "minutes", "seconds"} - set(fieldnames)
+    if missing:
+        yield 1, None, "缺少列：" + "、".join(sorted(missing))
+        return
+
+    while True:
+        # 字段超过长度限制等格式错误只影响当前行，读取器会从下一行继续
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, None, f"CSV格式错误：{e}"
+            continue
+        if None in row:
+            yield reader.line_num, None, "列数多于表头"
+            continue
+        yield reader.line_num, row, None
+
+
+def iter_tasks(path, fmt=None):
+    """逐条读取任务文件
+
+    生成 (行号, 任务, 错误信息)，记录有效时错误信息为None，无效时任务为None。
+    """
+    fmt = fmt or file_format(path)
+    if fmt == "csv":
+        # utf-8-sig 兼容Excel导出的带BOM的CSV
+        f = open(path, 'r', encoding='utf-8-sig', newline='')
+        records = _iter_csv_records(f)
+    else:
+        f = open(path, 'r', encoding='utf-8')
+        records = _iter_jsonl_records(f)
+
+    with f:
+        for line_no, data, error in records:
+            if error is None:
+                try:
+                    yield line_no, Task.from_dict(validate_task_data(data)), None
+                    continue
+                except ValueError as e:
+                    error = str(e)
+            yield line_no, None, error
+
+
+def import_tasks(path, on_batch, existing_ids=(), batch_size=1000, fmt=None):
+    """导入任务文件，每凑够batch_size个有效任务调用一次on_batch(任务列表)
+
+    与已有任务或文件中前面的任务ID重复时重新生成ID。
+    返回 (导入数量, [(行号, 错误信息), ...])。
+    """
+    seen = set(existing_ids)
+    batch = []
+    errors = []
+    count = 0
+
+    for line_no, task, error in iter_tasks(path, fmt):
+        if error is not None:
+            errors.append((line_no, error))
+            continue
+
+        if task.id in seen:
+            task.id = Task().id
+        seen.add(task.id)
+
+        batch.append(task)
+        if len(batch) >= batch_size:
+            on_batch(batch)
+            count += len(batch)
+            batch = []
+
+    if batch:
+        on_batch(batch)
+        count += len(batch)
+    return count, errors
+
+
+def export_tasks(path, tasks, fmt=None):
+    """逐条写出任务，返回写出的数量"""
+    fmt = fmt or file_format(path)
+    count = 0
+    if fmt == "csv":
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            # 运行中任务的 deadline 等运行状态不写入CSV
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for task in tasks:
+                writer.writerow(task.to_dict())
+                count += 1
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            for task in tasks:
+                f.write(json.dumps(task.to_dict(), ensure_ascii=False) + "\n")
+                count += 1
+    return count
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""测试只覆盖不依赖Qt和pygame的模块，直接从 src 导入"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""AudioIndex：音频库索引的增量检查和持久化"""
+
+import os
+import wave
+
+from audio import AudioIndex
+
+
+def write_wav(path, seconds, rate=8000):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b"\0\0" * int(seconds * rate))
+
+
+def make_index(tmp_path):
+    audio_dir = tmp_path / "audio"
+    audio_dir.mkdir(exist_ok=True)
+    return audio_dir, AudioIndex(str(audio_dir), str(tmp_path / "audio_index.json"))
+
+
+def test_refresh_reports_added_removed_and_changed(tmp_path):
+    audio_dir, index = make_index(tmp_path)
+    write_wav(audio_dir / "a.wav", 1)
+    (audio_dir / "b.mp3").write_bytes(b"mp3")
+    (audio_dir / "notes.txt").write_text("不是音频")
+
+    added, removed, changed = index.refresh()
+    assert (sorted(added), removed, changed) == (["a.wav", "b.mp3"], [], [])
+    assert index.dirty
+    assert index.get(str(audio_dir / "a.wav"))["duration"] == 1.0
+    assert index.get(str(audio_dir / "b.mp3"))["duration"] is None  # 第一次解码时补充
+    assert index.refresh() == ([], [], [])
+
+    write_wav(audio_dir / "a.wav", 2)
+    os.utime(audio_dir / "a.wav", (1, 1))
+    os.remove(audio_dir / "b.mp3")
+    assert index.refresh() == ([], ["b.mp3"], ["a.wav"])
+    assert index.files() == {"a.wav": str(audio_dir / "a.wav")}
+    assert index.get(str(audio_dir / "b.mp3")) is None
+
+
+def test_save_and_load(tmp_path):
+    audio_dir, index = make_index(tmp_path)
+    (audio_dir / "b.ogg").write_bytes(b"ogg")
+    index.refresh()
+    index.set_duration(str(audio_dir / "b.ogg"), 3.5)
+    index.save()
+    assert not index.dirty
+
+    _, loaded = make_index(tmp_path)
+    assert loaded.load()
+    assert loaded.get(str(audio_dir / "b.ogg"))["duration"] == 3.5
+    assert loaded.refresh() == ([], [], [])
+
+    # 索引属于其他目录时不使用
+    other = AudioIndex(str(tmp_path / "other"), index.index_file)
+    assert not other.load()
+
+
+def test_set_duration_marks_dirty_only_on_change(tmp_path):
+    audio_dir, index = make_index(tmp_path)
+    (audio_dir / "b.mp3").write_bytes(b"mp3")
+    index.refresh()
+    index.save()
+
+    index.set_duration(str(audio_dir / "b.mp3"), 2.0)
+    assert index.dirty
+    index.save()
+    index.set_duration(str(audio_dir / "b.mp3"), 2.0)
+    index.set_duration(str(audio_dir / "missing.mp3"), 1.0)
+    assert not index.dirty
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""TaskColumns 列式存储和 BatchTicker，NumPy 和 array.array 两种实现结果一致"""
+
+import pytest
+
+import engine
+from engine import TaskColumns, BatchTicker
+
+BACKENDS = [
+    pytest.param(False, id="array"),
+    pytest.param(True, id="numpy", marks=pytest.mark.skipif(engine.numpy is None, reason="未安装NumPy")),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def columns(request):
+    return TaskColumns(capacity=2, use_numpy=request.param)
+
+
+def test_add_start_and_expire(columns):
+    for task_id, duration in (("a", 10), ("b", 20), ("c", 30)):
+        columns.add(task_id, duration)
+    assert len(columns) == 3 and columns.capacity >= 3  # 超出初始容量时扩容
+
+    columns.start("a", 100.0)
+    columns.start("b", 100.0, seconds=5)
+    assert columns.deadline("a") == 110.0
+    assert columns.deadline("c") is None
+
+    assert list(columns.remaining(100.5)) == [10, 5, -1]
+    assert columns.expired(105.0) == ["b"]
+    assert columns.expired(105.0) == []  # 已完成的任务不会再次到期
+    assert columns.deadline("b") is None
+
+    columns.stop("a")
+    assert columns.expired(200.0) == []
+
+
+def test_removed_slots_are_reused(columns):
+    columns.add("a", 10)
+    slot = columns.add("b", 10)
+    columns.start("b", 0.0)
+    columns.remove("b")
+    assert "b" not in columns and len(columns) == 1
+
+    assert columns.add("c", 30) == slot
+    assert columns.deadline("c") is None
+    assert columns.expired(100.0) == []
+
+
+def test_tick_reports_only_changed_display_values(columns):
+    columns.add("a", 10)
+    columns.add("b", 3)
+    columns.add("idle", 5)
+    columns.start("a", 0.0)
+    columns.start("b", 0.0)
+
+    # 未运行的槽位初始显示值就是-1，不会出现在变化中
+    expired, changed, values = columns.tick(0.5)
+    assert expired == []
+    assert list(changed) == [0, 1] and list(values) == [10, 3]
+
+    # 同一秒内显示值不变
+    expired, changed, values = columns.tick(0.9)
+    assert (expired, list(changed)) == ([], [])
+
+    expired, changed, values = columns.tick(3.0)
+    assert expired == ["b"]
+    assert list(changed) == [0, 1] and list(values) == [7, -1]
+
+
+def test_batch_ticker_run(columns):
+    columns.add("a", 2)
+    columns.add("b", 3)
+    columns.start("a", 0.0)
+    columns.start("b", 0.0)
+
+    now = [0.0]
+    finished, changes = [], []
+    ticker = BatchTicker(columns, clock=lambda: now[0])
+    ticker.subscribe("finished", finished.extend)
+    ticker.subscribe("changed", lambda slots, values: changes.append(dict(zip(slots, values))))
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    ticker.run(interval=1.0, sleep=sleep)
+
+    assert finished == ["a", "b"]
+    assert now[0] == 3.0  # 所有任务到期后停止
+    assert [{int(k): int(v) for k, v in change.items()} for change in changes] == [
+        {0: 2, 1: 3}, {0: 1, 1: 2}, {0: -1, 1: 1}, {1: -1}]
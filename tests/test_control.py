@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""命令行解析和单实例转发"""
+
+import sys
+import json
+import socket
+import threading
+
+import pytest
+
+from control import (
+    ControlDispatcher, ControlSession, parse_duration, parse_command_line, forward_command_line, server_path
+)
+from engine import Task, TimerEngine
+
+
+class FakeHost:
+    """ControlDispatcher 需要的宿主接口，不依赖界面"""
+
+    def __init__(self, *tasks):
+        self.engine = TimerEngine()
+        self.tasks = self.engine.tasks
+        self.activated = 0
+        self.add_tasks(tasks)
+
+    def add_tasks(self, tasks):
+        for task in tasks:
+            self.engine.add_task(task)
+
+    def remove_task(self, task):
+        self.engine.remove_task(task)
+
+    def ensure_loaded(self):
+        pass
+
+    def activate(self):
+        self.activated += 1
+
+
+def test_dispatcher_commands():
+    host = FakeHost(Task(name="喝水", minutes=5))
+    dispatcher = ControlDispatcher(host)
+
+    assert dispatcher.execute(None, {"id": 7, "cmd": "activate"}) == {"id": 7, "result": True, "ok": True}
+    assert host.activated == 1
+
+    created = dispatcher.execute(None, {"cmd": "create", "name": "午休", "minutes": 30, "start": True})
+    assert created["ok"] and created["result"]["running"]
+    assert len(host.tasks) == 2
+
+    stopped = dispatcher.execute(None, {"cmd": "stop", "name": "午休"})
+    assert stopped["ok"] and not stopped["result"]["running"]
+
+    started = dispatcher.execute(None, {"cmd": "start", "task": created["result"]["id"], "seconds": 90})
+    assert started["ok"] and started["result"]["remaining_seconds"] == 90
+
+    listed = dispatcher.execute(None, {"cmd": "list", "running": True})
+    assert [task["name"] for task in listed["result"]] == ["午休"]
+
+    assert dispatcher.execute(None, {"cmd": "delete", "name": "喝水"})["ok"]
+    assert [task.name for task in host.tasks] == ["午休"]
+
+
+@pytest.mark.parametrize("request_", [
+    [],
+    {"cmd": "nope"},
+    {"cmd": "get"},
+    {"cmd": "get", "name": "不存在"},
+    {"cmd": "create", "minutes": 0},
+    {"cmd": "start", "name": "喝水", "seconds": 1e400},
+    {"cmd": "start", "name": "喝水", "seconds": True},
+    {"cmd": "subscribe"},
+    {"cmd": "batch", "commands": "list"},
+])
+def test_dispatcher_rejects_invalid_requests(request_):
+    dispatcher = ControlDispatcher(FakeHost(Task(name="喝水", minutes=5)))
+    response = dispatcher.execute(None, request_)
+    assert response["ok"] is False and response["error"]
+
+
+def test_dispatcher_batch_and_close():
+    host = FakeHost(Task(name="喝水", minutes=5))
+    dispatcher = ControlDispatcher(host)
+
+    response = dispatcher.execute(None, {"cmd": "batch", "commands": [
+        {"cmd": "start", "name": "喝水"}, {"cmd": "stop", "name": "不存在"}]})
+    assert [item["ok"] for item in response["result"]] == [True, False]
+
+    # 关闭后不再订阅引擎事件
+    dispatcher.close()
+    assert dispatcher._on_finished not in host.engine._listeners["finished"]
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("25", 25 * 60),
+    ("25m", 25 * 60),
+    ("1h30m", 5400),
+    ("90s", 90),
+    ("1h5s", 3605),
+    ("1:30", 90),
+    ("1:30:00", 5400),
+    (" 2M ", 120),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["", "m", "1.5m", "1:2:3:4", "-5", "abc", "1h:30"])
+def test_parse_duration_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_duration(text)
+
+
+def test_parse_command_line():
+    assert parse_command_line([]) == [{"cmd": "activate"}]
+    assert parse_command_line(["list"]) == [{"cmd": "list"}]
+    assert parse_command_line(["add", "1h1m5s", "喝", "水"]) == [{
+        "cmd": "create", "name": "喝 水", "reminder_text": "喝 水",
+        "hours": 1, "minutes": 1, "seconds": 5, "start": True}]
+    assert parse_command_line(["stop", "午休"]) == [{"cmd": "stop", "name": "午休"}]
+    assert parse_command_line(["start", "{abc}"]) == [{"cmd": "start", "task": "{abc}"}]
+    assert parse_command_line(['{"cmd": "ping"}', '{"cmd": "list"}']) == [{"cmd": "ping"}, {"cmd": "list"}]
+
+
+@pytest.mark.parametrize("argv", [["-platform", "offscreen"], ["add"], ["start"], ["list", "x"], ["{bad"]])
+def test_parse_command_line_rejects_unknown(argv):
+    with pytest.raises(ValueError):
+        parse_command_line(argv)
+
+
+@pytest.fixture
+def instance_name(tmp_path, monkeypatch):
+    if sys.platform == "win32":
+        pytest.skip("使用Unix套接字模拟正在运行的实例")
+    monkeypatch.setenv("TMPDIR", str(tmp_path))
+    return "countdown-timer-test"
+
+
+def serve_once(name, received):
+    """模拟正在运行的实例：接受一个连接，所有命令都返回成功"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(server_path(name))
+    server.listen(1)
+
+    def run():
+        connection, _ = server.accept()
+        with connection, connection.makefile('rwb') as file:
+            request = json.loads(file.readline())
+            received.append(request)
+            results = [{"ok": True, "result": True} for _ in request["commands"]]
+            file.write((json.dumps({"id": request["id"], "ok": True, "result": results}) + "\n").encode())
+            file.flush()
+        server.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_forward_without_instance_starts_normally(instance_name):
+    assert forward_command_line(["list"], instance_name) is None
+    # Qt参数、文件路径等无法识别的参数不能阻止程序启动
+    assert forward_command_line(["-platform", "offscreen"], instance_name) is None
+
+
+def test_forward_unknown_arguments_activates_instance(instance_name):
+    received = []
+    thread = serve_once(instance_name, received)
+    assert forward_command_line(["-style", "fusion"], instance_name) == 0
+    thread.join(2)
+    assert received[0]["commands"] == [{"cmd": "activate"}]
+
+
+def test_session_drops_oversized_requests(monkeypatch):
+    monkeypatch.setattr(ControlSession, "MAX_LINE_BYTES", 64)
+    sent = []
+    session = ControlDispatcher(FakeHost()).session(sent.append)
+
+    assert session.feed(b'{"id": 1, "cmd": "ping"}\n{"id": 2, "cmd"')
+    assert session.feed(b': "ping"}\n')
+    assert [message["id"] for message in sent] == [1, 2]
+
+    # 没有换行的数据超过上限时断开，不会无限缓存
+    assert session.feed(b"x" * 40)
+    assert not session.feed(b"x" * 40)
+    assert sent[-1]["ok"] is False
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""TimerEngine 和 TaskRegistry"""
+
+from engine import Task, TaskRegistry, TimerEngine
+
+
+class FakeClock:
+    """可手动推进的单调时钟"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_engine(*durations):
+    clock = FakeClock()
+    engine = TimerEngine(clock=clock)
+    tasks = []
+    for seconds in durations:
+        task = Task(name=f"任务{seconds}", seconds=seconds)
+        engine.add_task(task)
+        tasks.append(task)
+    return clock, engine, tasks
+
+
+def test_advance_fires_expired_tasks_in_deadline_order():
+    clock, engine, (slow, fast) = make_engine(30, 10)
+    finished = []
+    engine.subscribe("finished", lambda task, deadline: finished.append((task, deadline)))
+    engine.start(slow)
+    engine.start(fast)
+
+    assert engine.next_deadline() == clock.now + 10
+    assert engine.advance(clock.now + 5) == []
+
+    assert engine.advance(clock.now + 30) == [fast, slow]
+    assert finished == [(fast, 1010.0), (slow, 1030.0)]
+    assert not fast.running and not slow.running
+    assert engine.running_tasks == {}
+    assert engine.next_deadline() is None
+
+
+def test_stopped_and_restarted_tasks_fire_once_at_new_deadline():
+    clock, engine, (task,) = make_engine(10)
+    engine.start(task)
+    engine.stop(task)
+    assert engine.advance(clock.now + 20) == []
+
+    engine.start(task)
+    clock.now += 5
+    engine.start(task)  # 重新开始，旧的截止时间作废
+    assert engine.advance(clock.now + 9) == []
+    assert engine.advance(clock.now + 10) == [task]
+
+
+def test_disabled_task_does_not_start():
+    _clock, engine, (task,) = make_engine(10)
+    task.enabled = False
+    assert engine.start(task) is False
+    assert engine.running_tasks == {}
+
+
+def test_restarting_keeps_heap_bounded():
+    _clock, engine, tasks = make_engine(*range(1, 11))
+    for _ in range(1000):
+        for task in tasks:
+            engine.start(task)
+    assert len(engine._heap) <= 2 * len(tasks) + engine.HEAP_SLACK
+
+
+def test_resume_restarts_pending_and_fires_overdue_tasks():
+    _clock, engine, (pending, overdue) = make_engine(600, 600)
+    pending.resume_deadline = 5000.0 + 120
+    overdue.resume_deadline = 5000.0 - 30
+    finished = []
+    engine.subscribe("finished", lambda task, deadline: finished.append(task))
+
+    expired = engine.resume([pending, overdue], wall_now=5000.0)
+
+    assert expired == [overdue] and finished == [overdue]
+    assert pending.running
+    assert engine.next_deadline() == engine.clock() + 120
+    assert pending.resume_deadline is None and overdue.resume_deadline is None
+
+
+def test_resume_ignores_tasks_without_saved_deadline():
+    _clock, engine, (task,) = make_engine(60)
+    assert engine.resume([task], wall_now=5000.0) == []
+    assert not task.running
+
+
+def test_registry_remove_renumbers_following_rows():
+    tasks = [Task(name=str(i), seconds=1) for i in range(5)]
+    registry = TaskRegistry(tasks)
+
+    registry.remove(tasks[1])
+
+    assert len(registry) == 4
+    assert tasks[1] not in registry
+    assert registry.get(tasks[1].id) is None
+    assert [registry.row_of(task) for task in tasks[2:]] == [1, 2, 3]
+    assert registry[1] is tasks[2]
+
+
+def test_registry_keeps_first_of_duplicate_ids():
+    first, second = Task(name="a"), Task(name="b")
+    second.id = first.id
+    registry = TaskRegistry([first, second])
+    assert list(registry) == [first]
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""ConfigStore 的快照、变更日志重放和压缩，SQLiteStore 的迁移和增量写入"""
+
+import os
+
+from storage import ConfigStore, SQLiteStore, open_store
+
+
+def make_tasks(count):
+    return [{"id": f"id{i}", "name": f"任务{i}", "minutes": 1} for i in range(count)]
+
+
+def load_tasks(store):
+    config = store.load_settings()
+    return [task for chunk in store.iter_tasks(config, chunk_size=2) for task in chunk]
+
+
+def test_snapshot_round_trip(tmp_path):
+    store = ConfigStore(str(tmp_path / "settings.json"))
+    try:
+        store.compact({"tasks": make_tasks(5), "audio": {"channels": 4}})
+        assert store.load_settings() == {"audio": {"channels": 4}}
+        assert [task["id"] for task in load_tasks(store)] == [f"id{i}" for i in range(5)]
+        assert store.get_task("id3")["name"] == "任务3"
+        assert store.get_task("missing") is None
+    finally:
+        store.close()
+
+
+def test_first_chunk_size(tmp_path):
+    store = ConfigStore(str(tmp_path / "settings.json"))
+    try:
+        store.compact({"tasks": make_tasks(7)})
+        chunks = list(store.iter_tasks(store.load_settings(), chunk_size=3, first_chunk_size=1))
+        assert [len(chunk) for chunk in chunks] == [1, 3, 3]
+    finally:
+        store.close()
+
+
+def test_journal_replay_and_compaction(tmp_path):
+    path = str(tmp_path / "settings.json")
+    store = ConfigStore(path, use_journal=True)
+    store.compact({"tasks": make_tasks(3)})
+    store.append({"op": "upsert", "task": {"id": "id1", "name": "改名", "minutes": 2}})
+    store.append({"op": "delete", "id": "id0"})
+    store.append({"op": "upsert", "task": {"id": "new", "name": "新任务", "minutes": 3}})
+    store.close()
+
+    # 重新打开时在快照之上重放变更日志，新增的任务排在末尾
+    store = ConfigStore(path, use_journal=True)
+    try:
+        tasks = load_tasks(store)
+        assert [task["id"] for task in tasks] == ["id1", "id2", "new"]
+        assert tasks[0]["name"] == "改名"
+        assert store.journal_entries == 3
+
+        store.compact({"tasks": tasks})
+        assert store.journal_entries == 0
+        assert os.path.getsize(store.journal_file) == 0
+        assert [task["id"] for task in load_tasks(store)] == ["id1", "id2", "new"]
+    finally:
+        store.close()
+
+
+def test_truncated_journal_line_is_ignored(tmp_path):
+    path = str(tmp_path / "settings.json")
+    store = ConfigStore(path, use_journal=True)
+    store.compact({"tasks": make_tasks(2)})
+    store.append({"op": "delete", "id": "id0"})
+    store.close()
+    with open(path + ".journal", "a", encoding="utf-8") as f:
+        f.write('{"op": "delete", "id": "id1"')  # 崩溃时写了一半的行
+
+    store = ConfigStore(path, use_journal=True)
+    try:
+        assert [task["id"] for task in load_tasks(store)] == ["id1"]
+    finally:
+        store.close()
+
+
+def test_legacy_config_with_inline_tasks(tmp_path):
+    path = tmp_path / "settings.json"
+    path.write_text('{"tasks": [{"id": "a", "name": "旧任务", "minutes": 5}], "window": {}}', encoding="utf-8")
+    store = ConfigStore(str(path))
+    try:
+        assert [task["id"] for task in load_tasks(store)] == ["a"]
+    finally:
+        store.close()
+
+
+def test_journal_entries_count_written_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ConfigStore, "JOURNAL_COMPACT_THRESHOLD", 3)
+    path = str(tmp_path / "settings.json")
+    store = ConfigStore(path, use_journal=True)
+    store.compact({"tasks": make_tasks(1)})
+    for i in range(3):
+        store.append({"op": "upsert", "task": {"id": "id0", "name": f"改名{i}", "minutes": 1}})
+    store.flush()
+    assert store.journal_entries == 3 and store.needs_compaction()
+
+    # 后台快照写入后清零，之后的改动重新计数
+    store.save({"tasks": [{"id": "id0", "name": "快照", "minutes": 1}]})
+    store.append({"op": "delete", "id": "id0"})
+    store.flush()
+    assert store.journal_entries == 1 and not store.needs_compaction()
+    store.close()
+
+    # 重新打开时按日志文件中的行数计数
+    store = ConfigStore(path, use_journal=True)
+    try:
+        assert store.journal_entries == 1
+        assert load_tasks(store) == []
+    finally:
+        store.close()
+
+
+def test_sqlite_migrates_json_config(tmp_path):
+    legacy = ConfigStore(str(tmp_path / "settings.json"), use_journal=True)
+    legacy.compact({"tasks": make_tasks(3), "audio": {"channels": 2}})
+    legacy.append({"op": "delete", "id": "id1"})
+    legacy.close()
+
+    store = open_store(str(tmp_path), backend="sqlite")
+    try:
+        assert store.load_settings() == {"audio": {"channels": 2}}
+        assert [task["id"] for task in load_tasks(store)] == ["id0", "id2"]
+    finally:
+        store.close()
+
+    # 已迁移过的数据库不会再被JSON配置覆盖
+    os.remove(str(tmp_path / "settings.json.journal"))
+    store = open_store(str(tmp_path), backend="sqlite")
+    try:
+        assert [task["id"] for task in load_tasks(store)] == ["id0", "id2"]
+    finally:
+        store.close()
+
+
+def test_sqlite_upsert_delete_and_queries(tmp_path):
+    store = SQLiteStore(str(tmp_path / "settings.db"))
+    try:
+        assert store.load_settings() is None
+        store.compact({"tasks": make_tasks(2), "window": {"x": 1}})
+
+        store.append({"op": "upsert", "task": {"id": "id0", "name": "改名", "minutes": 1,
+                                               "enabled": False, "deadline": 200.0}})
+        store.append({"op": "upsert", "task": {"id": "new", "name": "新任务", "minutes": 1,
+                                               "deadline": 100.0}})
+        store.append({"op": "delete", "id": "id1"})
+        store.flush()
+
+        tasks = load_tasks(store)
+        assert [task["id"] for task in tasks] == ["id0", "new"]  # 改动不影响顺序，新增的在末尾
+        assert store.get_task("id0")["name"] == "改名"
+        assert store.get_task("id1") is None
+        assert [task["id"] for task in store.next_expiring()] == ["new", "id0"]
+        assert store.count_enabled() == 1
+    finally:
+        store.close()
+
+
+def test_sqlite_compact_replaces_tasks_in_snapshot_order(tmp_path):
+    path = str(tmp_path / "settings.db")
+    store = SQLiteStore(path)
+    store.compact({"tasks": make_tasks(4)})
+    tasks = make_tasks(4)
+    store.compact({"tasks": [tasks[3], tasks[0], {"id": "id2", "name": "改名", "minutes": 5}]})
+    store.close()
+
+    store = SQLiteStore(path)
+    try:
+        assert [task["id"] for task in load_tasks(store)] == ["id3", "id0", "id2"]
+        assert store.get_task("id2")["minutes"] == 5
+        assert store.get_task("id1") is None
+    finally:
+        store.close()
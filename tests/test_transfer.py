@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""任务记录校验和 CSV/JSON Lines 往返"""
+
+import csv
+
+import pytest
+
+from engine import Task, TimerEngine
+from transfer import validate_task_data, import_tasks, export_tasks
+
+
+def test_validate_normalizes_strings_and_numbers():
+    data = validate_task_data({"name": None, "hours": "1", "minutes": " 30 ", "enabled": "否"})
+    assert data == {"name": "", "reminder_text": "", "audio_file": "",
+                    "hours": 1, "minutes": 30, "seconds": 0, "enabled": False}
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"minutes": 60},
+    {"hours": 100},
+    {"minutes": "abc"},
+    {"minutes": True},
+    {"seconds": -1},
+    {"minutes": 0},
+    {"minutes": 1, "name": 5},
+    {"minutes": 1, "enabled": "maybe"},
+])
+def test_validate_rejects_invalid_records(data):
+    with pytest.raises(ValueError):
+        validate_task_data(data)
+
+
+def make_tasks():
+    return [
+        Task(name="喝水", minutes=25, reminder_text="起来走走"),
+        Task(name="午休, 带逗号", hours=1, seconds=5, reminder_text='含"引号"', enabled=False),
+    ]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".csv"])
+def test_round_trip(tmp_path, suffix):
+    tasks = make_tasks()
+    path = str(tmp_path / ("tasks" + suffix))
+    assert export_tasks(path, tasks) == 2
+
+    imported = []
+    count, errors = import_tasks(path, imported.extend)
+
+    assert (count, errors) == (2, [])
+    assert [task.to_dict() for task in imported] == [task.to_dict() for task in tasks]
+
+
+def test_csv_export_of_running_task(tmp_path):
+    engine = TimerEngine()
+    task = Task(name="运行中", minutes=5)
+    engine.add_task(task)
+    engine.start(task)
+
+    path = str(tmp_path / "tasks.csv")
+    assert export_tasks(path, [task]) == 1
+    imported = []
+    assert import_tasks(path, imported.extend) == (1, [])
+    assert imported[0].minutes == 5
+
+
+def test_import_reports_bad_lines_and_regenerates_duplicate_ids(tmp_path):
+    path = tmp_path / "tasks.jsonl"
+    path.write_text(
+        '{"id": "a", "minutes": 1}\n'
+        'not json\n'
+        '{"id": "a", "minutes": 2}\n'
+        '{"minutes": 99}\n', encoding="utf-8")
+
+    batches = []
+    count, errors = import_tasks(str(path), batches.append, existing_ids=["x"], batch_size=1)
+
+    assert count == 2
+    assert [line_no for line_no, _ in errors] == [2, 4]
+    assert [len(batch) for batch in batches] == [1, 1]
+    first, second = batches[0][0], batches[1][0]
+    assert first.id == "a" and second.id != "a"
+
+
+def test_csv_oversized_field_is_a_line_error(tmp_path):
+    path = tmp_path / "tasks.csv"
+    path.write_text(
+        "name,hours,minutes,seconds\n"
+        "a,0,1,0\n"
+        "b,0," + "1" * (csv.field_size_limit() + 1) + ",0\n"
+        "c,0,2,0\n", encoding="utf-8")
+
+    imported = []
+    count, errors = import_tasks(str(path), imported.extend)
+
+    assert count == 2
+    assert [task.name for task in imported] == ["a", "c"]
+    assert len(errors) == 1 and errors[0][1].startswith("CSV格式错误")